@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import argparse
+import queue
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 import cv2
@@ -8,7 +10,7 @@ import yaml
 
 from .sources import VideoFileSource, WebcamSource
 from .core import YOLODetector, ObjectTracker, TrajectoryVisualizer
-from .processors import TrackingPipeline
+from .processors import TrackingPipeline, create_video_writer
 
 
 def load_config(config_path: str) -> dict:
@@ -22,12 +24,20 @@ def create_pipeline(config: dict) -> TrackingPipeline:
     # Initialize components
     detector = YOLODetector(
         model_path=config['detector']['model_path'],
-        device=config['detector']['device']
+        device=config['detector']['device'],
+        precision=config['detector'].get('precision', 'fp16'),
+        export_format=config['detector'].get('export_format'),
+        calibration_data=config['detector'].get('calibration_data'),
+        imgsz=config['detector'].get('imgsz', 640),
+        compile_model=config['detector'].get('compile', False),
+        iou_threshold=config['detector'].get('iou_threshold', 0.7),
+        max_det=config['detector'].get('max_det', 300)
     )
     
     tracker = ObjectTracker(
         max_disappeared=config['tracker']['max_disappeared'],
-        max_distance=config['tracker']['max_distance']
+        max_distance=config['tracker']['max_distance'],
+        trajectory_length=config['tracker'].get('trajectory_length')
     )
     
     visualizer = TrajectoryVisualizer(
@@ -39,20 +49,31 @@ def create_pipeline(config: dict) -> TrackingPipeline:
         show_trajectory=config['visualizer']['show_trajectory'],
         show_heatmap=config['visualizer'].get('show_heatmap', False),
         heatmap_alpha=config['visualizer'].get('heatmap_alpha', 0.6),
-        heatmap_update_interval=config['visualizer'].get('heatmap_update_interval', 10)
+        heatmap_update_interval=config['visualizer'].get('heatmap_update_interval', 10),
+        use_opencl=config['visualizer'].get('use_opencl', False)
     )
     
-    return TrackingPipeline(detector, tracker, visualizer)
+    return TrackingPipeline(
+        detector, tracker, visualizer,
+        motion_threshold=config['detector'].get('motion_threshold'),
+        detector_stride=config['detector'].get('stride', 1),
+        scene_change_threshold=config['detector'].get('scene_change_threshold')
+    )
+
+
+# Status overlay text style
+STATUS_FONT = cv2.FONT_HERSHEY_SIMPLEX
+STATUS_ORIGIN = (10, 30)
+STATUS_COLOR = (0, 255, 0)
 
 
 def add_status_overlay(frame, metadata):
     """Add status overlay to frame."""
-    info = metadata.get('metadata', {})
-    tracked_objects = metadata.get('tracked_objects', [])
+    info = metadata.get('metadata') or {}
+    num_objects = len(metadata.get('tracked_objects') or ())
     
-    status_text = f"Frame: {info.get('frame_number', 0)} | Objects: {len(tracked_objects)}"
-    cv2.putText(frame, status_text, (10, 30), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    status_text = "Frame: %d | Objects: %d" % (info.get('frame_number', 0), num_objects)
+    cv2.putText(frame, status_text, STATUS_ORIGIN, STATUS_FONT, 0.7, STATUS_COLOR, 2)
     return frame
 
 
@@ -73,20 +94,26 @@ def process_file(args):
     print(f"Processing: {args.input}")
     print(f"Output: {args.output}")
     
-    # Progress callback
+    # Progress callback; process_video calls it at most once per second
     def show_progress(current, total):
-        if total > 0 and current % 30 == 0:
+        if total > 0:
             progress = current / total * 100
             print(f"Progress: {current}/{total} frames ({progress:.1f}%)")
     
     # Process video
     try:
-        with VideoFileSource(args.input) as source:
+        input_config = config.get('input', {})
+        with VideoFileSource(args.input,
+                             backend=input_config.get('video_backend', 'opencv'),
+                             hwaccel=input_config.get('hwaccel')) as source:
             results = pipeline.process_video(
                 source,
                 output_path=args.output,
                 show_preview=not args.no_preview,
-                progress_callback=show_progress if not args.quiet else None
+                progress_callback=show_progress if not args.quiet else None,
+                batch_size=config['detector'].get('batch_size', 1),
+                encoder=config['output'].get('encoder', 'mp4v'),
+                progress_interval=1.0
             )
     except Exception as e:
         print(f"Error processing video: {e}", file=sys.stderr)
@@ -129,70 +156,74 @@ def process_webcam(args):
     # Setup output
     output_path = None
     out = None
+    frame_count = 0
+    output_dir = Path(args.output)
+    batch_size = config['detector'].get('batch_size', 1)
+    preview_every_n = max(1, config['output'].get('preview_every_n', 1))
+    
+    # Encode screenshots and heatmaps off the capture loop
+    save_q = queue.Queue()
+    
+    def save_loop():
+        while True:
+            item = save_q.get()
+            if item is None:
+                break
+            label, path, image = item
+            cv2.imwrite(str(path), image)
+            print(f"{label} saved: {path}")
+    
+    saver = threading.Thread(target=save_loop, daemon=True)
+    saver.start()
     
     try:
-        with WebcamSource(args.camera) as source:
+        # Only the newest camera frame is read, so a slow frame never
+        # leaves later ones queued behind it
+        with WebcamSource(args.camera, latest_only=True) as source:
             props = source.get_properties()
+            frame_shape = (props['height'], props['width'])
             
             if args.save:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_dir = Path(args.output)
                 output_dir.mkdir(parents=True, exist_ok=True)
                 output_path = output_dir / f"webcam_{timestamp}.mp4"
                 
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(
-                    str(output_path), fourcc, 
-                    props['fps'], (props['width'], props['height'])
+                out = create_video_writer(
+                    output_path, props['fps'], (props['width'], props['height']),
+                    encoder=config['output'].get('encoder', 'mp4v'),
+                    codec=config['output'].get('codec', 'mp4v')
                 )
                 print(f"Recording to: {output_path}")
             
-            frame_count = 0
-            while True:
-                ret, frame = source.read()
-                if not ret:
-                    break
-                
-                # Process frame
-                result = pipeline.process_frame(frame, {
-                    'frame_number': frame_count,
-                    'source_properties': props
-                })
-                
+            def handle_result(result):
                 vis_frame = result['frame']
                 
-                # Write to output
-                if out is not None:
-                    out.write(vis_frame)
-                
                 # Show preview
-                cv2.imshow('Webcam Tracking', vis_frame)
+                if result['metadata']['frame_number'] % preview_every_n == 0:
+                    cv2.imshow('Webcam Tracking', vis_frame)
                 
-                # Handle keyboard
-                key = cv2.waitKey(1) & 0xFF
+                # Handle keyboard without blocking on the GUI event loop
+                key = cv2.pollKey() & 0xFF
+                if key == 0xFF:
+                    return
                 
                 if key == ord('q'):
-                    break
+                    return False
                 elif key == ord('s'):
                     # Save screenshot
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    screenshot_path = Path(args.output) / f"screenshot_{timestamp}.png"
+                    screenshot_path = output_dir / f"screenshot_{timestamp}.png"
                     screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-                    cv2.imwrite(str(screenshot_path), vis_frame)
-                    print(f"Screenshot saved: {screenshot_path}")
+                    save_q.put(("Screenshot", screenshot_path, vis_frame.copy()))
                 elif key == ord('h'):
-                    # Save heatmap
-                    heatmap = pipeline.generate_heatmap((props['height'], props['width']))
+                    # Save heatmap, built on the thread that owns the tracker
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    heatmap_path = Path(args.output) / f"heatmap_{timestamp}.png"
-                    cv2.imwrite(str(heatmap_path), heatmap)
-                    print(f"Heatmap saved: {heatmap_path}")
+                    heatmap_path = output_dir / f"heatmap_{timestamp}.png"
+                    pipeline.call_between_frames(lambda: save_q.put(
+                        ("Heatmap", heatmap_path, pipeline.generate_heatmap(frame_shape))))
                 elif key == ord('r'):
-                    # Reset tracking
-                    pipeline.tracker = ObjectTracker(
-                        max_disappeared=config['tracker']['max_disappeared'],
-                        max_distance=config['tracker']['max_distance']
-                    )
+                    # Reset tracking between frames on the tracking thread
+                    pipeline.call_between_frames(pipeline.reset_tracking)
                     pipeline.visualizer.reset_heatmap_cache()
                     print("Tracking reset")
                 elif key == ord('t'):
@@ -212,13 +243,19 @@ def process_webcam(args):
                     new_alpha = max(0.0, current_alpha - 0.1)
                     pipeline.visualizer.set_heatmap_alpha(new_alpha)
                     print(f"Heatmap opacity: {new_alpha:.1f}")
-                
-                frame_count += 1
+            
+            # Decode, process and encode in overlapping stages
+            frame_count = pipeline.process_stream(
+                source, writer=out, on_result=handle_result, batch_size=batch_size
+            )
                 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
     finally:
+        # Finish pending image saves before exiting
+        save_q.put(None)
+        saver.join()
         if out is not None:
             out.release()
         cv2.destroyAllWindows()
@@ -1,5 +1,5 @@
-from .detector import YOLODetector
-from .tracker import ObjectTracker
+from .detector import YOLODetector, Detections
+from .tracker import ObjectTracker, TrackedBatch, TrajectoryBuffer
 from .visualizer import TrajectoryVisualizer
 
-__all__ = ['YOLODetector', 'ObjectTracker', 'TrajectoryVisualizer']
\ No newline at end of file
+__all__ = ['YOLODetector', 'Detections', 'ObjectTracker', 'TrackedBatch', 'TrajectoryBuffer', 'TrajectoryVisualizer']
\ No newline at end of file
@@ -1,30 +1,358 @@
 from ultralytics import YOLO
+import cv2
 import numpy as np
-from typing import List, Dict, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Iterator, Any
+
+
+# Suffix Ultralytics appends to exported artifacts, keyed by export format
+EXPORT_SUFFIXES = {
+    'engine': '.engine',
+    'onnx': '.onnx',
+    'openvino': '_openvino_model',
+}
+
+PRECISIONS = ('fp32', 'fp16', 'int8')
+
+# Input size exported artifacts are built for unless told otherwise; other
+# sizes get their own cached artifact
+DEFAULT_IMGSZ = 640
+
+# Tensor inputs bypass Ultralytics' letterboxing, so their height and width
+# must be multiples of the model stride
+MODEL_STRIDE = 32
+
+
+def _is_gpu_mat(frame) -> bool:
+    """Check whether a frame is a GPU-resident cv2.cuda_GpuMat."""
+    return isinstance(frame, getattr(cv2, 'cuda_GpuMat', ()))
+
+
+@dataclass
+class Detections:
+    """Detections for a single frame stored as parallel arrays.
+    
+    Indexing or iterating yields the per-detection dictionaries used
+    elsewhere in the project, so existing consumers keep working.
+    """
+    bboxes: np.ndarray = field(default_factory=lambda: np.empty((0, 4), dtype=np.float32))
+    confidences: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+    class_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=int))
+    class_names: List[str] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.class_ids)
+    
+    def __getitem__(self, index: int) -> Dict:
+        return {
+            'bbox': self.bboxes[index],
+            'confidence': float(self.confidences[index]),
+            'class_id': int(self.class_ids[index]),
+            'class_name': self.class_names[index]
+        }
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def to_dicts(self) -> List[Dict]:
+        """Convert to a list of per-detection dictionaries."""
+        return list(self)
 
 
 class YOLODetector:
-    def __init__(self, model_path: str = "yolov8n.pt", device: str = "cpu"):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path: str = "yolov8n.pt", device: str = "cpu",
+                 precision: str = "fp16", export_format: Optional[str] = None,
+                 calibration_data: Optional[str] = None, imgsz: int = DEFAULT_IMGSZ,
+                 compile_model: bool = False, iou_threshold: float = 0.7,
+                 max_det: int = 300):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        if export_format is not None and precision == 'fp32':
+            raise ValueError("export_format requires fp16 or int8 precision")
+        if compile_model and (export_format is not None or not model_path.endswith('.pt')):
+            raise ValueError("compile_model only applies to PyTorch .pt models")
+        
         self.device = device
+        self.precision = precision
+        self.imgsz = imgsz
+        # NMS runs inside Ultralytics on the inference device; these bound
+        # its work on crowded frames
+        self.iou_threshold = iou_threshold
+        self.max_det = max_det
+        # FP16 inference halves activation memory traffic on GPUs; CPUs
+        # gain nothing from it, so it stays off there
+        self._half = precision == 'fp16' and not str(device).startswith('cpu')
+        # Reusable downscale/contiguous-copy targets, one per position in a batch
+        self._resize_bufs: List[np.ndarray] = []
+        # On CUDA, frames are uploaded as tensors through a reused pinned buffer
+        self._tensor_input = str(device).startswith('cuda')
+        self._pinned_buf = None
+        # Side stream for host-to-device copies, created on first upload
+        self._copy_stream = None
+        self._copy_done = None
+        # torch.compile is applied once Ultralytics has built its predictor
+        self._compile_pending = False
+        
+        if export_format is not None and precision != 'fp32' and model_path.endswith('.pt'):
+            exported_path = self._export_model(model_path, export_format, calibration_data)
+            self.model = YOLO(exported_path, task='detect')
+        else:
+            self.model = YOLO(model_path)
+            self._compile_pending = compile_model
+    
+    def _compile_model(self) -> None:
+        """Compile the module the predictor runs for a fixed input shape with torch.compile.
+        
+        Ultralytics wraps the model in an AutoBackend when the predictor is
+        first set up, fusing it into a new module, so compiling the YOLO
+        object's own model would be discarded. The predictor's module is
+        compiled instead, which needs one inference to have run.
+        
+        With ``dynamic=False`` the graph is specialized on the first call's
+        shape, which is fixed for a given camera or video. On CUDA the
+        'reduce-overhead' mode also captures the forward pass as a CUDA
+        graph, removing per-call kernel launch overhead.
+        """
+        import torch
+        
+        backend = self.model.predictor.model
+        mode = 'reduce-overhead' if self._tensor_input else 'default'
+        backend.model = torch.compile(backend.model, mode=mode, dynamic=False)
+        self._compile_pending = False
+    
+    def _predict(self, source, classes: Optional[List[int]], conf_threshold: float):
+        """Run the model on prepared input, compiling it after the first call if requested."""
+        results = self.model(source, device=self.device, conf=conf_threshold, classes=classes,
+                             imgsz=self.imgsz, half=self._half, iou=self.iou_threshold,
+                             max_det=self.max_det)
+        if self._compile_pending:
+            self._compile_model()
+        return results
+    
+    def _export_model(self, model_path: str, export_format: str,
+                      calibration_data: Optional[str] = None) -> str:
+        """Export the model at reduced precision, reusing a cached artifact.
+        
+        Args:
+            model_path: Path to the source .pt model
+            export_format: Ultralytics export format (engine, onnx, openvino)
+            calibration_data: Dataset YAML used for INT8 calibration
+            
+        Returns:
+            Path to the exported model
+        """
+        if export_format not in EXPORT_SUFFIXES:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        
+        source = Path(model_path)
+        size = f"_{self.imgsz}" if self.imgsz != DEFAULT_IMGSZ else ""
+        cached = source.with_name(
+            f"{source.stem}_{self.precision}{size}{EXPORT_SUFFIXES[export_format]}")
+        if cached.exists():
+            return str(cached)
+        
+        export_args = {
+            'format': export_format,
+            'half': self.precision == 'fp16',
+            'int8': self.precision == 'int8',
+            'device': self.device,
+            # Engines are built for a fixed input shape, so match the one
+            # frames are downscaled to
+            'imgsz': self.imgsz,
+        }
+        if self.precision == 'int8' and calibration_data is not None:
+            export_args['data'] = calibration_data
+        
+        exported = YOLO(model_path).export(**export_args)
+        Path(exported).rename(cached)
+        return str(cached)
+        
+    def detect(self, frame: np.ndarray, classes: List[int] = None, conf_threshold: float = 0.5) -> Detections:
+        if _is_gpu_mat(frame):
+            source, scale = self._gpu_mats_to_device([frame])
+        else:
+            image, scale = self._downscale(frame, 0)
+            source = self._to_device([image]) if self._tensor_input else image
+        results = self._predict(source, classes, conf_threshold)
+        return self._parse_result(results[0], scale)
+    
+    def detect_batch(self, frames: List[np.ndarray], classes: List[int] = None,
+                     conf_threshold: float = 0.5) -> List[Detections]:
+        """Detect objects in several frames with a single model call.
+        
+        Args:
+            frames: Frames to run inference on, either arrays or
+                same-sized cv2.cuda_GpuMat frames
+            classes: Optional class IDs to keep
+            conf_threshold: Minimum detection confidence
+            
+        Returns:
+            Detections for each input frame, in input order
+        """
+        if not frames:
+            return []
+        
+        if _is_gpu_mat(frames[0]):
+            source, scale = self._gpu_mats_to_device(frames)
+            scales = [scale] * len(frames)
+        else:
+            images, scales = zip(*(self._downscale(frame, i) for i, frame in enumerate(frames)))
+            source = self._to_device(images) if self._tensor_input else list(images)
+        results = self._predict(source, classes, conf_threshold)
+        return [self._parse_result(r, scale) for r, scale in zip(results, scales)]
+    
+    def _downscale(self, frame: np.ndarray, slot: int) -> Tuple[np.ndarray, float]:
+        """Shrink a frame so its longer side matches the model input size.
+        
+        The model letterboxes to ``imgsz`` anyway; resizing here with
+        INTER_AREA into a reused buffer avoids a fresh allocation per frame.
+        
+        Args:
+            frame: Input frame
+            slot: Position of the frame in its batch, selecting the buffer
+            
+        Returns:
+            Tuple of (image passed to the model, scale applied to the frame)
+        """
+        height, width = frame.shape[:2]
+        scale = self.imgsz / max(height, width)
+        if scale >= 1.0:
+            if frame.flags['C_CONTIGUOUS']:
+                return frame, 1.0
+            # Cropped or strided views would otherwise be copied inside the model
+            buf = self._slot_buffer(slot, frame.shape, frame.dtype)
+            np.copyto(buf, frame)
+            return buf, 1.0
+        
+        shape = (round(height * scale), round(width * scale)) + frame.shape[2:]
+        buf = self._slot_buffer(slot, shape, frame.dtype)
+        cv2.resize(frame, (shape[1], shape[0]), dst=buf, interpolation=cv2.INTER_AREA)
+        return buf, scale
+    
+    def _slot_buffer(self, slot: int, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Return the reusable buffer for a batch slot, reallocating on shape change."""
+        if slot == len(self._resize_bufs):
+            self._resize_bufs.append(np.empty(shape, dtype=dtype))
+        elif self._resize_bufs[slot].shape != shape or self._resize_bufs[slot].dtype != dtype:
+            self._resize_bufs[slot] = np.empty(shape, dtype=dtype)
+        return self._resize_bufs[slot]
+    
+    def _to_device(self, images):
+        """Upload BGR frames to the device as one model-ready batch.
+        
+        Frames are staged one at a time into a reused pinned host buffer.
+        Each frame's transfer is queued on a side CUDA stream as soon as it
+        is staged, so staging frame i+1 on the host overlaps the copy of
+        frame i over PCIe. The compute stream then waits for the copies and
+        converts the batch to RGB CHW floats in [0, 1]. Padding is added
+        on the bottom and right up to the largest frame rounded to the
+        model stride, so box coordinates still match each unpadded frame
+        and frames of different sizes share one batch.
+        
+        Args:
+            images: BGR frames, already downscaled to at most ``imgsz``
+            
+        Returns:
+            Tensor of shape (N, 3, H, W) on ``self.device``
+        """
+        import torch
+        
+        max_height = max(image.shape[0] for image in images)
+        max_width = max(image.shape[1] for image in images)
+        shape = (len(images),
+                 -(-max_height // MODEL_STRIDE) * MODEL_STRIDE,
+                 -(-max_width // MODEL_STRIDE) * MODEL_STRIDE,
+                 3)
+        if self._copy_stream is None:
+            self._copy_stream = torch.cuda.Stream(device=self.device)
+            self._copy_done = torch.cuda.Event()
+        else:
+            # The pinned buffer must not be overwritten while the previous
+            # upload is still reading it
+            self._copy_done.synchronize()
+        
+        if self._pinned_buf is None or tuple(self._pinned_buf.shape) != shape:
+            # Gray padding matches Ultralytics' letterbox fill
+            self._pinned_buf = torch.full(shape, 114, dtype=torch.uint8).pin_memory()
+        
+        compute_stream = torch.cuda.current_stream(self.device)
+        batch = torch.empty(shape, dtype=torch.uint8, device=self.device)
+        # The copies must not start before earlier compute work that may
+        # still be using the memory now given to ``batch``
+        self._copy_stream.wait_stream(compute_stream)
+        
+        host = self._pinned_buf.numpy()
+        for i, image in enumerate(images):
+            height, width = image.shape[:2]
+            host[i, :height, :width] = image
+            # A smaller frame in a reused slot must not see a larger one's pixels
+            host[i, height:] = 114
+            host[i, :height, width:] = 114
+            with torch.cuda.stream(self._copy_stream):
+                batch[i].copy_(self._pinned_buf[i], non_blocking=True)
+        self._copy_done.record(self._copy_stream)
+        
+        compute_stream.wait_event(self._copy_done)
+        return self._normalize(batch)
+    
+    def _gpu_mats_to_device(self, frames) -> Tuple[Any, float]:
+        """Turn same-sized BGR GpuMats into a model-ready batch on the GPU.
+        
+        Frames are downscaled with cv2.cuda and shared with torch through
+        DLPack, so they never pass through host memory. Padding and
+        normalization match _to_device.
+        
+        Args:
+            frames: cv2.cuda_GpuMat frames of identical size
+            
+        Returns:
+            Tuple of (tensor of shape (N, 3, H, W), scale applied to the frames)
+        """
+        import torch
+        
+        width, height = frames[0].size()
+        scale = min(1.0, self.imgsz / max(height, width))
+        size = (round(width * scale), round(height * scale))
+        
+        tensors = []
+        for frame in frames:
+            if scale < 1.0:
+                frame = cv2.cuda.resize(frame, size, interpolation=cv2.INTER_AREA)
+            tensors.append(torch.from_dlpack(frame)[..., :3])
+        batch = torch.stack(tensors)
+        
+        height, width = batch.shape[1:3]
+        padded = torch.full((len(frames),
+                             -(-height // MODEL_STRIDE) * MODEL_STRIDE,
+                             -(-width // MODEL_STRIDE) * MODEL_STRIDE,
+                             3), 114, dtype=torch.uint8, device=batch.device)
+        padded[:, :height, :width] = batch
+        return self._normalize(padded), scale
+    
+    def _normalize(self, batch):
+        """Convert a uint8 BGR NHWC batch to RGB NCHW in [0, 1] at the inference precision."""
+        batch = batch.flip(-1).permute(0, 3, 1, 2)
+        batch = batch.half() if self._half else batch.float()
+        return batch.div_(255)
+    
+    def _parse_result(self, result, scale: float = 1.0) -> Detections:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return Detections()
         
-    def detect(self, frame: np.ndarray, classes: List[int] = None, conf_threshold: float = 0.5) -> List[Dict]:
-        results = self.model(frame, device=self.device, conf=conf_threshold, classes=classes)
-        
-        detections = []
-        for r in results:
-            boxes = r.boxes
-            if boxes is not None:
-                for box in boxes:
-                    detection = {
-                        'bbox': box.xyxy[0].cpu().numpy(),
-                        'confidence': float(box.conf[0]),
-                        'class_id': int(box.cls[0]),
-                        'class_name': self.model.names[int(box.cls[0])]
-                    }
-                    detections.append(detection)
-        
-        return detections
+        # One host transfer per tensor instead of one per box
+        bboxes = boxes.xyxy.cpu().numpy()
+        if scale != 1.0:
+            bboxes = bboxes / scale
+        class_ids = boxes.cls.cpu().numpy().astype(int)
+        return Detections(
+            bboxes=bboxes,
+            confidences=boxes.conf.cpu().numpy(),
+            class_ids=class_ids,
+            class_names=[self.model.names[c] for c in class_ids.tolist()]
+        )
     
     def get_class_names(self) -> Dict[int, str]:
         return self.model.names
\ No newline at end of file
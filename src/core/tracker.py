@@ -1,59 +1,196 @@
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union, Iterator
 from collections import defaultdict
+from dataclasses import dataclass, field
 import supervision as sv
 
+from .detector import Detections
+
+
+class TrajectoryBuffer:
+    """Array-backed store of the (x, y) centers of a single track.
+    
+    With ``max_len`` set, only the most recent ``max_len`` points are kept.
+    Every point is written twice, ``max_len`` slots apart, so the retained
+    points always form one contiguous slice and ``view()`` never copies.
+    Without ``max_len`` the buffer grows geometrically and keeps the full
+    history.
+    
+    Points are written through a flat memoryview of the buffer, since
+    storing two Python ints that way costs a fraction of NumPy's
+    per-call indexing overhead. The slice returned by ``view()`` is cached
+    until the next push, so reading every trajectory each frame only
+    slices the ones that moved.
+    """
+    
+    def __init__(self, max_len: Optional[int] = None, initial_capacity: int = 64):
+        self.max_len = max_len
+        capacity = 2 * max_len if max_len is not None else initial_capacity
+        self._set_buffer(np.empty((capacity, 2), dtype=np.int32))
+        self._count = 0
+        self._view: Optional[np.ndarray] = None
+    
+    def _set_buffer(self, buf: np.ndarray) -> None:
+        self._buf = buf
+        self._cells = memoryview(buf.reshape(-1))
+    
+    def push(self, x: int, y: int) -> None:
+        """Append an integer point to the trajectory."""
+        cells = self._cells
+        if self.max_len is not None:
+            slot = 2 * (self._count % self.max_len)
+            mirror = slot + 2 * self.max_len
+            cells[slot] = cells[mirror] = x
+            cells[slot + 1] = cells[mirror + 1] = y
+        else:
+            if self._count == len(self._buf):
+                grown = np.empty((2 * len(self._buf), 2), dtype=np.int32)
+                grown[:self._count] = self._buf
+                self._set_buffer(grown)
+                cells = self._cells
+            slot = 2 * self._count
+            cells[slot] = x
+            cells[slot + 1] = y
+        self._count += 1
+        self._view = None
+    
+    def view(self) -> np.ndarray:
+        """Return the retained points, oldest first, as an (N, 2) int32 array.
+        
+        The returned array shares memory with the buffer and is only valid
+        until the next push.
+        """
+        if self._view is None:
+            if self.max_len is None or self._count <= self.max_len:
+                self._view = self._buf[:self._count]
+            else:
+                start = self._count % self.max_len
+                self._view = self._buf[start:start + self.max_len]
+        return self._view
+    
+    def __len__(self) -> int:
+        if self.max_len is None:
+            return self._count
+        return min(self._count, self.max_len)
+
+
+@dataclass
+class TrackedBatch:
+    """Objects tracked in a single frame stored as parallel arrays.
+    
+    Indexing or iterating yields the per-object dictionaries used
+    elsewhere in the project, so existing consumers keep working.
+    """
+    ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=int))
+    bboxes: np.ndarray = field(default_factory=lambda: np.empty((0, 4), dtype=np.float32))
+    centers: np.ndarray = field(default_factory=lambda: np.empty((0, 2), dtype=int))
+    class_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=int))
+    confidences: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+    trajectories: List[np.ndarray] = field(default_factory=list)
+    
+    @classmethod
+    def from_dicts(cls, tracked_objects: List[Dict]) -> 'TrackedBatch':
+        """Build a batch from per-object dictionaries."""
+        if len(tracked_objects) == 0:
+            return cls()
+        return cls(
+            ids=np.array([obj['id'] for obj in tracked_objects]),
+            bboxes=np.stack([obj['bbox'] for obj in tracked_objects]),
+            centers=np.array([obj['center'] for obj in tracked_objects]),
+            class_ids=np.array([obj.get('class_id', 0) for obj in tracked_objects]),
+            confidences=np.array([obj.get('confidence', 1.0) for obj in tracked_objects]),
+            trajectories=[obj['trajectory'] for obj in tracked_objects]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, index: int) -> Dict:
+        return {
+            'id': int(self.ids[index]),
+            'bbox': self.bboxes[index],
+            'center': (int(self.centers[index, 0]), int(self.centers[index, 1])),
+            'class_id': int(self.class_ids[index]),
+            'confidence': float(self.confidences[index]),
+            'trajectory': self.trajectories[index]
+        }
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def as_dicts(self) -> List[Dict]:
+        """Convert to a list of per-object dictionaries."""
+        return list(self)
+
 
 class ObjectTracker:
-    def __init__(self, max_disappeared: int = 30, max_distance: float = 50):
+    def __init__(self, max_disappeared: int = 30, max_distance: float = 50,
+                 trajectory_length: Optional[int] = None):
         self.byte_tracker = sv.ByteTrack(
             track_activation_threshold=0.25,
             lost_track_buffer=max_disappeared,
             minimum_matching_threshold=0.8,
             frame_rate=30
         )
-        self.tracks = defaultdict(list)
+        self.max_disappeared = max_disappeared
+        self.trajectory_length = trajectory_length
+        self.tracks = defaultdict(lambda: TrajectoryBuffer(self.trajectory_length))
         self.max_distance = max_distance
         
-    def update(self, detections: List[Dict], frame_shape: Tuple[int, int]) -> List[Dict]:
-        if not detections:
-            return []
+    def update(self, detections: Union[Detections, List[Dict]], frame_shape: Tuple[int, int]) -> TrackedBatch:
+        if len(detections) == 0:
+            return TrackedBatch()
         
         # Convert detections to supervision format
-        xyxy = np.array([d['bbox'] for d in detections])
-        confidence = np.array([d['confidence'] for d in detections])
-        class_id = np.array([d['class_id'] for d in detections])
+        if isinstance(detections, Detections):
+            xyxy = detections.bboxes
+            confidence = detections.confidences
+            class_id = detections.class_ids
+        else:
+            # Build each column directly in its final dtype, so the boxes are
+            # not converted to float32 again below
+            xyxy = np.asarray([d['bbox'] for d in detections], dtype=np.float32)
+            confidence = np.array([d['confidence'] for d in detections], dtype=np.float32)
+            class_id = np.array([d['class_id'] for d in detections], dtype=int)
         
+        # Contiguous float32 boxes avoid a hidden conversion inside supervision;
+        # arrays that already qualify are passed through without a copy
         detections_sv = sv.Detections(
-            xyxy=xyxy,
+            xyxy=np.ascontiguousarray(xyxy, dtype=np.float32),
             confidence=confidence,
             class_id=class_id
         )
         
         # Update tracks
         tracks = self.byte_tracker.update_with_detections(detections_sv)
+        if tracks.tracker_id is None or len(tracks.tracker_id) == 0:
+            return TrackedBatch()
+        
+        num_tracks = len(tracks.tracker_id)
+        ids = np.asarray(tracks.tracker_id, dtype=int)
+        centers = ((tracks.xyxy[:, :2] + tracks.xyxy[:, 2:]) / 2).astype(int)
+        
+        # Store trajectories
+        trajectories = []
+        for track_id, (center_x, center_y) in zip(ids.tolist(), centers.tolist()):
+            trajectory = self.tracks[track_id]
+            trajectory.push(center_x, center_y)
+            trajectories.append(trajectory.view())
         
-        # Build tracked objects with IDs
-        tracked_objects = []
-        for i, track_id in enumerate(tracks.tracker_id):
-            if track_id is not None:
-                center_x = int((tracks.xyxy[i][0] + tracks.xyxy[i][2]) / 2)
-                center_y = int((tracks.xyxy[i][1] + tracks.xyxy[i][3]) / 2)
-                
-                # Store trajectory
-                self.tracks[track_id].append((center_x, center_y))
-                
-                tracked_obj = {
-                    'id': track_id,
-                    'bbox': tracks.xyxy[i],
-                    'center': (center_x, center_y),
-                    'class_id': tracks.class_id[i] if tracks.class_id is not None else 0,
-                    'confidence': tracks.confidence[i] if tracks.confidence is not None else 1.0,
-                    'trajectory': list(self.tracks[track_id])
-                }
-                tracked_objects.append(tracked_obj)
-        
-        return tracked_objects
-    
-    def get_all_trajectories(self) -> Dict[int, List[Tuple[int, int]]]:
-        return dict(self.tracks)
\ No newline at end of file
+        return TrackedBatch(
+            ids=ids,
+            bboxes=tracks.xyxy,
+            centers=centers,
+            class_ids=tracks.class_id if tracks.class_id is not None else np.zeros(num_tracks, dtype=int),
+            confidences=tracks.confidence if tracks.confidence is not None else np.ones(num_tracks),
+            trajectories=trajectories
+        )
+    
+    def reset(self) -> None:
+        """Forget all tracks and trajectories, reusing the tracker instance."""
+        self.tracks.clear()
+        self.byte_tracker.reset()
+    
+    def get_all_trajectories(self) -> Dict[int, np.ndarray]:
+        return {track_id: trajectory.view() for track_id, trajectory in self.tracks.items()}
\ No newline at end of file
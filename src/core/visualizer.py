@@ -1,8 +1,44 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional, Union
 from collections import deque
 
+from .tracker import TrackedBatch
+
+
+@lru_cache(maxsize=256)
+def _thickness_bands(num_points: int, base_thickness: int) -> Tuple[Tuple[int, int, int], ...]:
+    """Split a tapered trail into runs of segments with equal thickness.
+    
+    Segment i (joining points i and i+1) fades from thin to
+    ``base_thickness`` towards the newest point. Since thickness never
+    decreases along the trail, equal thicknesses form contiguous runs.
+    
+    Returns:
+        Tuples of (first_point, last_point, thickness), one per run
+    """
+    thickness = np.maximum(1, (base_thickness * np.arange(1, num_points) / num_points).astype(np.int32))
+    edges = np.flatnonzero(np.diff(thickness)) + 1
+    starts = np.concatenate(([0], edges))
+    stops = np.concatenate((edges, [num_points - 1]))
+    return tuple((int(a), int(b), int(thickness[a])) for a, b in zip(starts, stops))
+
+
+@lru_cache(maxsize=256)
+def _dot_radius_runs(num_points: int) -> Tuple[Tuple[int, int, int], ...]:
+    """Group the dots drawn on every 5th trail point into runs of equal radius.
+    
+    Returns:
+        Tuples of (first_dot, stop_dot, radius), one per run
+    """
+    num_dots = len(range(0, num_points, 5))
+    radii = np.maximum(1, (3 * np.arange(num_dots) / num_points).astype(np.int32))
+    edges = np.flatnonzero(np.diff(radii)) + 1
+    starts = np.concatenate(([0], edges))
+    stops = np.concatenate((edges, [num_dots]))
+    return tuple((int(a), int(b), int(radii[a])) for a, b in zip(starts, stops))
+
 
 class TrajectoryVisualizer:
     def __init__(self, 
@@ -14,7 +50,8 @@ class TrajectoryVisualizer:
                  show_trajectory: bool = True,
                  show_heatmap: bool = False,
                  heatmap_alpha: float = 0.6,
-                 heatmap_update_interval: int = 10):
+                 heatmap_update_interval: int = 10,
+                 use_opencl: bool = False):
         
         self.trajectory_length = trajectory_length
         self.trajectory_color = trajectory_color
@@ -25,25 +62,51 @@ class TrajectoryVisualizer:
         self.show_heatmap = show_heatmap
         self.heatmap_alpha = heatmap_alpha
         self.heatmap_update_interval = heatmap_update_interval
+        # The heatmap's wide blur is the costliest per-frame visualization
+        # step and has an OpenCL kernel; the drawing primitives have none,
+        # so only heatmap rendering moves to the OpenCL device
+        self.use_opencl = use_opencl and cv2.ocl.haveOpenCL()
         
-        # Color palette for different objects
-        self.colors = self._generate_colors(100)
+        # Color palette for different objects, as an (N, 3) uint8 array and
+        # as cached tuples that can be handed to OpenCV without conversion
+        self.colors_np = self._generate_colors(100)
+        self.colors = [tuple(int(c) for c in row) for row in self.colors_np]
         
         # Heatmap cache
         self._heatmap_cache = None
         self._frame_count = 0
         
-    def _generate_colors(self, n: int) -> List[Tuple[int, int, int]]:
-        colors = []
-        for i in range(n):
-            hue = int(180 * i / n)
-            color = cv2.cvtColor(np.uint8([[[hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0][0]
-            colors.append(tuple(int(c) for c in color))
-        return colors
+        # Incremental heatmap state: point counts so far, how many points of
+        # each trajectory are already counted, and the last rendered image
+        self._heat_accum = None
+        # Length and first point of each trajectory at the last update
+        self._heat_seen: Dict[int, Tuple[int, Tuple[int, ...]]] = {}
+        self._heat_rendered = None
+        self._heat_dirty = False
+        
+    def _generate_colors(self, n: int) -> np.ndarray:
+        # Convert all hues in a single 1 x n image rather than n 1-pixel images
+        hsv = np.full((1, n, 3), 255, dtype=np.uint8)
+        hsv[0, :, 0] = (180 * np.arange(n) // n).astype(np.uint8)
+        return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0]
     
-    def draw_frame(self, frame: np.ndarray, tracked_objects: List[Dict], 
-                  all_trajectories: Optional[Dict[int, List[Tuple[int, int]]]] = None) -> np.ndarray:
-        vis_frame = frame.copy()
+    def draw_frame(self, frame: np.ndarray, tracked_objects: Union[TrackedBatch, List[Dict]], 
+                  all_trajectories: Optional[Dict[int, np.ndarray]] = None,
+                  inplace: bool = False, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Drawing in place skips a full-frame copy when the caller
+        # does not need the original frame afterwards; drawing into a
+        # caller-owned ``out`` buffer keeps the original without allocating.
+        # ``inplace`` is shorthand for ``out=frame``
+        if inplace:
+            if out is not None and out is not frame:
+                raise ValueError("inplace drawing cannot target a separate out buffer")
+            out = frame
+        if out is None:
+            vis_frame = frame.copy()
+        else:
+            if out is not frame:
+                np.copyto(out, frame)
+            vis_frame = out
         
         # Draw dynamic heatmap overlay if enabled
         if self.show_heatmap and all_trajectories:
@@ -63,15 +126,23 @@ class TrajectoryVisualizer:
                 
                 # Blend heatmap with frame
                 vis_frame = cv2.addWeighted(vis_frame, 1 - self.heatmap_alpha, 
-                                          self._heatmap_cache, self.heatmap_alpha, 0)
+                                          self._heatmap_cache, self.heatmap_alpha, 0,
+                                          dst=vis_frame)
+        
+        if not isinstance(tracked_objects, TrackedBatch):
+            tracked_objects = TrackedBatch.from_dicts(tracked_objects)
         
-        for obj in tracked_objects:
-            obj_id = obj['id']
+        # Convert the per-object arrays to Python ints once for OpenCV
+        ids = tracked_objects.ids.tolist()
+        bboxes = tracked_objects.bboxes.astype(np.int32).tolist()
+        centers = tracked_objects.centers.tolist()
+        
+        for obj_index, obj_id in enumerate(ids):
             color = self.colors[obj_id % len(self.colors)]
             
             # Draw bounding box
             if self.show_bbox:
-                bbox = obj['bbox'].astype(int)
+                bbox = bboxes[obj_index]
                 cv2.rectangle(vis_frame, 
                             (bbox[0], bbox[1]), 
                             (bbox[2], bbox[3]), 
@@ -79,7 +150,7 @@ class TrajectoryVisualizer:
             
             # Draw ID
             if self.show_id:
-                center = obj['center']
+                center = centers[obj_index]
                 cv2.putText(vis_frame, 
                           f"ID: {obj_id}", 
                           (center[0] - 20, center[1] - 10),
@@ -89,41 +160,136 @@ class TrajectoryVisualizer:
                           2)
             
             # Draw trajectory
-            if self.show_trajectory and len(obj['trajectory']) > 1:
-                trajectory = obj['trajectory'][-self.trajectory_length:]
-                for i in range(1, len(trajectory)):
-                    # Gradually fade older points
-                    thickness = int(self.trajectory_thickness * (i / len(trajectory)))
-                    cv2.line(vis_frame, 
-                           trajectory[i-1], 
-                           trajectory[i], 
-                           color, 
-                           max(1, thickness))
+            trajectory = tracked_objects.trajectories[obj_index]
+            if self.show_trajectory and len(trajectory) > 1:
+                trajectory = np.asarray(trajectory[-self.trajectory_length:], dtype=np.int32)
+                # Gradually fade older points, one polyline per thickness
+                for first, last, thickness in _thickness_bands(len(trajectory),
+                                                               self.trajectory_thickness):
+                    cv2.polylines(vis_frame, [trajectory[first:last + 1]], False, color, thickness)
                 
-                # Draw points along trajectory
-                for i, point in enumerate(trajectory[::5]):  # Every 5th point
-                    radius = int(3 * (i / len(trajectory)))
-                    cv2.circle(vis_frame, point, max(1, radius), color, -1)
+                # Draw points along trajectory, every 5th point. A zero-length
+                # segment of thickness 2r rasterizes exactly like a filled
+                # circle of radius r, so each run of dots is one call
+                dots = np.repeat(trajectory[::5], 2, axis=0).reshape(-1, 2, 2)
+                for first, stop, radius in _dot_radius_runs(len(trajectory)):
+                    cv2.polylines(vis_frame, dots[first:stop], False, color, 2 * radius)
         
         return vis_frame
     
     def create_heatmap(self, frame_shape: Tuple[int, int], 
-                      all_trajectories: Dict[int, List[Tuple[int, int]]]) -> np.ndarray:
-        heatmap = np.zeros((frame_shape[0], frame_shape[1]), dtype=np.float32)
-        
-        for track_id, trajectory in all_trajectories.items():
-            for point in trajectory:
-                x, y = point
-                # Add gaussian blob at each point
-                cv2.circle(heatmap, (x, y), 20, 1, -1)
-        
-        # Normalize and apply colormap
-        heatmap = cv2.GaussianBlur(heatmap, (21, 21), 0)
-        heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min() + 1e-8)
-        heatmap = (heatmap * 255).astype(np.uint8)
-        heatmap_colored = cv2.applyColorMap(heatmap, cv2.COLORMAP_JET)
-        
-        return heatmap_colored
+                      all_trajectories: Dict[int, np.ndarray]) -> np.ndarray:
+        """Create a colored heatmap of all trajectory points.
+        
+        Only points added since the previous call are accumulated, and the
+        blur and colormap are skipped entirely when nothing new arrived.
+        Trajectories are assumed to only grow between calls; a trajectory
+        that shrank or disappeared triggers a full rebuild. The returned
+        image is cached and must not be modified by the caller.
+        """
+        self._update_heat_accum(frame_shape, all_trajectories)
+        
+        if self._heat_dirty or self._heat_rendered is None:
+            self._heat_rendered = self.render_heatmap(self._heat_accum)
+            self._heat_dirty = False
+        
+        return self._heat_rendered
+    
+    def render_heatmap(self, accum: np.ndarray) -> np.ndarray:
+        """Blur and colorize a per-pixel point count accumulator."""
+        if self.use_opencl:
+            accum = cv2.UMat(accum)
+        
+        # The wide blur kernel stands in for stamping a filled disk
+        # at each point
+        heatmap = cv2.GaussianBlur(accum, (61, 61), 10)
+        
+        # Normalize and cast to uint8 in a single pass, then apply colormap
+        heatmap = cv2.normalize(heatmap, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        heatmap = cv2.applyColorMap(heatmap, cv2.COLORMAP_JET)
+        return heatmap.get() if self.use_opencl else heatmap
+    
+    def _update_heat_accum(self, frame_shape: Tuple[int, int], 
+                           all_trajectories: Dict[int, np.ndarray]):
+        """Add trajectory points not yet counted to the heatmap accumulator.
+        
+        A trajectory whose first point changed was trimmed from the front
+        (a bounded tracker buffer), so its earlier counts no longer apply
+        and the accumulator is rebuilt from the retained points.
+        """
+        shape = (frame_shape[0], frame_shape[1])
+        stale = (
+            self._heat_accum is None
+            or self._heat_accum.shape != shape
+            or any(track_id not in all_trajectories
+                   or len(all_trajectories[track_id]) < seen
+                   or self._first_point(all_trajectories[track_id]) != first
+                   for track_id, (seen, first) in self._heat_seen.items())
+        )
+        
+        if stale:
+            self._heat_accum = self._accumulate_points(shape, all_trajectories)
+            self._heat_dirty = True
+        else:
+            new_points = {}
+            for track_id, trajectory in all_trajectories.items():
+                seen = self._heat_seen[track_id][0] if track_id in self._heat_seen else 0
+                if len(trajectory) > seen:
+                    new_points[track_id] = trajectory[seen:]
+            if new_points:
+                self._accumulate_points(shape, new_points, out=self._heat_accum)
+                self._heat_dirty = True
+        
+        self._heat_seen = {track_id: (len(t), self._first_point(t))
+                           for track_id, t in all_trajectories.items()}
+    
+    @staticmethod
+    def _first_point(trajectory) -> Tuple[int, ...]:
+        return tuple(np.asarray(trajectory[0]).tolist()) if len(trajectory) else ()
+    
+    def _accumulate_points(self, frame_shape: Tuple[int, int], 
+                           trajectories: Dict[int, np.ndarray],
+                           recency_weighted: bool = False,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Count trajectory points per pixel in a float32 accumulator.
+        
+        Args:
+            frame_shape: Shape of the frame (height, width)
+            trajectories: Trajectory points keyed by track ID
+            recency_weighted: Weight each point by its position in its
+                trajectory, so the most recent point counts fully
+            out: Existing accumulator to add the points to
+                
+        Returns:
+            Accumulator of shape frame_shape
+        """
+        height, width = frame_shape[0], frame_shape[1]
+        points = [np.asarray(t, dtype=np.int32).reshape(-1, 2) 
+                  for t in trajectories.values() if len(t) > 0]
+        if not points:
+            return np.zeros((height, width), dtype=np.float32) if out is None else out
+        
+        points = np.concatenate(points)
+        xs, ys = points[:, 0], points[:, 1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        
+        weights = None
+        if recency_weighted:
+            weights = np.concatenate([(np.arange(len(t)) + 1) / len(t)
+                                      for t in trajectories.values() if len(t) > 0])[inside]
+        
+        if out is None:
+            # A full rebuild touches every trajectory point, where one
+            # bincount over flat pixel indices beats np.add.at's scatter
+            flat = ys[inside].astype(np.intp) * width + xs[inside]
+            counts = np.bincount(flat, weights=weights, minlength=height * width)
+            return counts.astype(np.float32).reshape(height, width)
+        
+        # Incremental updates add a handful of points, too few to be
+        # worth a frame-sized bincount
+        np.add.at(out, (ys[inside], xs[inside]),
+                  1.0 if weights is None else weights.astype(np.float32))
+        return out
     
     def toggle_heatmap(self):
         """Toggle heatmap display on/off."""
@@ -139,23 +305,18 @@ class TrajectoryVisualizer:
         """Reset heatmap cache to force regeneration."""
         self._heatmap_cache = None
         self._frame_count = 0
+        self._heat_accum = None
+        self._heat_seen = {}
+        self._heat_rendered = None
+        self._heat_dirty = False
     
     def create_realtime_heatmap(self, frame_shape: Tuple[int, int], 
-                               current_trajectories: Dict[int, List[Tuple[int, int]]],
+                               current_trajectories: Dict[int, np.ndarray],
                                decay_factor: float = 0.95) -> np.ndarray:
         """Create a real-time updating heatmap with decay."""
-        current_heatmap = np.zeros((frame_shape[0], frame_shape[1]), dtype=np.float32)
-        
-        # Add current trajectory points
-        for track_id, trajectory in current_trajectories.items():
-            if len(trajectory) > 0:
-                # Weight recent points more heavily
-                for i, point in enumerate(trajectory):
-                    x, y = point
-                    if 0 <= x < frame_shape[1] and 0 <= y < frame_shape[0]:
-                        # More recent points get higher weight
-                        weight = (i + 1) / len(trajectory)
-                        cv2.circle(current_heatmap, (x, y), 15, weight, -1)
+        # Add current trajectory points, weighting recent points more heavily
+        current_heatmap = self._accumulate_points(frame_shape, current_trajectories,
+                                                  recency_weighted=True)
         
         # Apply decay to existing heatmap and add new data
         if self._heatmap_cache is not None:
@@ -173,15 +334,17 @@ class TrajectoryVisualizer:
             current_heatmap = decayed_cache + current_heatmap
         
         # Blur and normalize
-        current_heatmap = cv2.GaussianBlur(current_heatmap, (21, 21), 0)
-        if current_heatmap.max() > 0:
-            current_heatmap = current_heatmap / current_heatmap.max()
+        current_heatmap = cv2.GaussianBlur(current_heatmap, (45, 45), 8)
+        max_value = current_heatmap.max()
+        if max_value > 0:
+            np.multiply(current_heatmap, 1.0 / max_value, out=current_heatmap)
         
-        # Store as cache for next frame
-        self._heatmap_cache = current_heatmap.copy()
+        # Store as cache for next frame; the blur output is not touched
+        # again, so no copy is needed
+        self._heatmap_cache = current_heatmap
         
-        # Convert to color image
-        heatmap_uint8 = (current_heatmap * 255).astype(np.uint8)
+        # Scale and cast to uint8 in a single pass
+        heatmap_uint8 = cv2.convertScaleAbs(current_heatmap, alpha=255.0)
         heatmap_colored = cv2.applyColorMap(heatmap_uint8, cv2.COLORMAP_JET)
         
         return heatmap_colored
\ No newline at end of file
@@ -1,3 +1,4 @@
 from .pipeline import TrackingPipeline
+from .writer import create_video_writer
 
-__all__ = ['TrackingPipeline']
\ No newline at end of file
+__all__ = ['TrackingPipeline', 'create_video_writer']
\ No newline at end of file
@@ -1,10 +1,58 @@
 import cv2
-from typing import Dict, List, Optional, Callable, Any, Tuple
+import inspect
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from typing import Dict, List, Optional, Callable, Any, Tuple, Iterator
 from pathlib import Path
 import numpy as np
 
 from ..sources.base import VideoSource
-from ..core import YOLODetector, ObjectTracker, TrajectoryVisualizer
+from ..core import YOLODetector, ObjectTracker, Detections, TrackedBatch, TrajectoryVisualizer
+from .windowed import track_window, link_tracklets
+from .writer import create_video_writer
+
+
+# How a frame gets its detections: run the detector, reuse the previous
+# detections (motion gate) or predict them from the tracker (detector stride)
+DETECT, REUSE, PREDICT = 'detect', 'reuse', 'predict'
+
+# Decoded frame buffers process_video keeps in flight beyond one detection
+# batch: roughly one each being decoded, queued, drawn and encoded
+FRAME_RING_SLACK = 4
+
+
+def _reads_into(source: VideoSource) -> bool:
+    """Check whether a source's read() takes an ``out`` buffer.
+    
+    VideoSource.read gained ``out`` later, so subclasses written against
+    the old ``read(self)`` signature are read without one.
+    """
+    try:
+        parameters = inspect.signature(source.read).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == 'out' or p.kind is inspect.Parameter.VAR_KEYWORD
+               for p in parameters)
+
+
+def _open_gpu_preview(window_name: str, frame_shape: Tuple[int, int]) -> Optional[Any]:
+    """Create an OpenGL preview window fed from a reusable GPU frame.
+    
+    Returns the cv2.cuda_GpuMat to upload frames into before imshow, or
+    None when OpenCV lacks CUDA devices or OpenGL windows, in which case
+    frames are shown from host memory as usual.
+    """
+    if not hasattr(cv2, 'cuda') or cv2.cuda.getCudaEnabledDeviceCount() == 0:
+        return None
+    try:
+        cv2.namedWindow(window_name, cv2.WINDOW_OPENGL | cv2.WINDOW_AUTOSIZE)
+    except cv2.error:
+        return None
+    return cv2.cuda_GpuMat(frame_shape[0], frame_shape[1], cv2.CV_8UC3)
 
 
 class TrackingPipeline:
@@ -13,18 +61,47 @@ class TrackingPipeline:
     def __init__(self, 
                  detector: YOLODetector,
                  tracker: ObjectTracker,
-                 visualizer: TrajectoryVisualizer):
+                 visualizer: TrajectoryVisualizer,
+                 motion_threshold: Optional[float] = None,
+                 detector_stride: int = 1,
+                 scene_change_threshold: Optional[float] = None):
         """Initialize the tracking pipeline.
         
         Args:
             detector: Object detector instance
             tracker: Object tracker instance
             visualizer: Trajectory visualizer instance
+            motion_threshold: Mean absolute difference (0-255) between
+                consecutive 64x64 grayscale thumbnails below which detection
+                is skipped and the previous detections are reused.
+                None disables the motion gate.
+            detector_stride: Run the detector on every Nth frame only. The
+                frames in between are tracked against the last tracked
+                boxes, extrapolated at their current velocity.
+            scene_change_threshold: Thumbnail difference above which a frame
+                is treated as a cut and always detected, regardless of
+                the stride. None disables the guard.
         """
         self.detector = detector
         self.tracker = tracker
         self.visualizer = visualizer
         self.frame_processors: List[Callable] = []
+        # Swapped for _run_processors once a processor is added, so frames
+        # skip building the processor metadata while there are none
+        self._apply_processors = self._skip_processors
+        self.motion_threshold = motion_threshold
+        self.detector_stride = max(1, detector_stride)
+        self.scene_change_threshold = scene_change_threshold
+        self._prev_thumbnail: Optional[np.ndarray] = None
+        self._last_detections = None
+        # None until the first frame has been planned for detection
+        self._frames_since_detection: Optional[int] = None
+        self._last_tracked = None
+        self._prev_tracked = None
+        # Per-pixel count of tracked centers, built up as frames are tracked
+        self._heatmap_accum: Optional[np.ndarray] = None
+        # Tasks for the inference thread while a threaded run owns the tracker
+        self._between_frames: Optional[queue.SimpleQueue] = None
         
     def add_frame_processor(self, processor: Callable[[np.ndarray, Dict], np.ndarray]):
         """Add a custom frame processor to the pipeline.
@@ -33,13 +110,20 @@ class TrackingPipeline:
             processor: Function that takes (frame, metadata) and returns processed frame
         """
         self.frame_processors.append(processor)
+        self._apply_processors = self._run_processors
         
-    def process_frame(self, frame: np.ndarray, metadata: Optional[Dict] = None) -> Dict[str, Any]:
+    def process_frame(self, frame: np.ndarray, metadata: Optional[Dict] = None,
+                      inplace: bool = False, out: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """Process a single frame through the pipeline.
         
         Args:
             frame: Input frame
             metadata: Optional metadata for the frame
+            inplace: Draw visualizations directly onto the input frame,
+                the same as passing ``out=frame``
+            out: Caller-owned buffer to draw into instead of a fresh copy,
+                leaving the input frame intact. Cannot be combined with
+                ``inplace`` unless it is the input frame itself.
             
         Returns:
             Dictionary containing:
@@ -51,24 +135,214 @@ class TrackingPipeline:
         if metadata is None:
             metadata = {}
             
-        # Detect objects
-        detections = self.detector.detect(frame)
+        if inplace and out is not None and out is not frame:
+            raise ValueError("inplace drawing cannot target a separate out buffer")
+        
+        detections = self._detect(frame)
+        detections, tracked_objects, all_trajectories = self._track(frame, detections)
+        return self._render(frame, detections, tracked_objects, all_trajectories,
+                            metadata, inplace, out)
+    
+    def process_frames_batch(self, 
+                             frames: List[np.ndarray], 
+                             metadata_list: Optional[List[Dict]] = None,
+                             inplace: bool = False) -> List[Dict[str, Any]]:
+        """Process several frames, running detection on them in one batch.
+        
+        Tracking and visualization still run frame by frame in input order,
+        since the tracker is stateful.
+        
+        Args:
+            frames: Input frames in temporal order
+            metadata_list: Optional metadata for each frame
+            inplace: Draw visualizations directly onto the input frames
+            
+        Returns:
+            List of results in the same format as process_frame
+        """
+        if metadata_list is None:
+            metadata_list = [{} for _ in frames]
+        
+        batch_detections = self._detect_batch(frames)
+        
+        return [
+            self._process_detections(frame, detections, metadata, inplace)
+            for frame, detections, metadata in zip(frames, batch_detections, metadata_list)
+        ]
+    
+    def call_between_frames(self, task: Callable[[], Any]) -> None:
+        """Run a task that touches tracker state, between two tracked frames.
+        
+        While process_stream or process_video runs, the tracker is updated
+        on an inference thread, so the task is handed to that thread and
+        runs before it tracks its next frame; this call does not wait for
+        it. Otherwise the task runs immediately. Call it from the thread
+        consuming the results, e.g. from an ``on_result`` callback.
+        
+        Args:
+            task: Callable taking no arguments, e.g. reset_tracking
+        """
+        tasks = self._between_frames
+        if tasks is None:
+            task()
+        else:
+            tasks.put(task)
+    
+    def reset_tracking(self) -> None:
+        """Forget all tracks, the heatmap and the detection state built from them."""
+        self.tracker.reset()
+        self._start_run()
+    
+    @staticmethod
+    def _run_tasks(tasks: queue.SimpleQueue) -> None:
+        """Run every queued call_between_frames task."""
+        while True:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                return
+            task()
+    
+    def _start_run(self) -> None:
+        """Forget per-video state, so a new video starts with a detection and an empty heatmap."""
+        self.reset_heatmap()
+        self._frames_since_detection = None
+        self._prev_thumbnail = None
+        self._last_detections = None
+        self._last_tracked = None
+        self._prev_tracked = None
+    
+    def _detect_batch(self, frames: List[np.ndarray]) -> List[Any]:
+        """Detect objects in several frames with one detector call.
+        
+        Frames that are not due for detection get the same placeholder
+        results as in _detect.
+        """
+        plans = [self._plan_detection(frame) for frame in frames]
+        due = [frame for frame, plan in zip(frames, plans) if plan == DETECT]
+        detected = iter(self.detector.detect_batch(due) if due else [])
+        
+        batch_detections = []
+        for plan in plans:
+            if plan == DETECT:
+                self._last_detections = next(detected)
+            batch_detections.append(None if plan == PREDICT else self._last_detections)
+        return batch_detections
+    
+    def _detect(self, frame: np.ndarray):
+        """Detect objects in a frame, or skip the detector when possible.
+        
+        Returns the previous detections when nothing has moved, and None
+        for frames skipped by the detector stride; _track predicts
+        those from the tracker state.
+        """
+        plan = self._plan_detection(frame)
+        if plan == DETECT:
+            self._last_detections = self.detector.detect(frame)
+        return None if plan == PREDICT else self._last_detections
+    
+    def _plan_detection(self, frame: np.ndarray) -> str:
+        """Decide whether a frame is detected, reuses detections or is predicted."""
+        difference = self._frame_difference(frame)
+        
+        if self._frames_since_detection is None:
+            plan = DETECT
+        elif (self.scene_change_threshold is not None and difference is not None
+              and difference > self.scene_change_threshold):
+            plan = DETECT
+        elif (self.motion_threshold is not None and difference is not None
+              and difference < self.motion_threshold):
+            plan = REUSE
+        elif self._frames_since_detection + 1 < self.detector_stride:
+            plan = PREDICT
+        else:
+            plan = DETECT
+        
+        self._frames_since_detection = 0 if plan == DETECT else self._frames_since_detection + 1
+        return plan
+    
+    def _frame_difference(self, frame: np.ndarray) -> Optional[float]:
+        """Mean absolute difference from the previous frame's thumbnail.
+        
+        Always records the frame's thumbnail for the next comparison. Returns
+        None for the first frame, or when neither the motion gate nor the
+        scene-change guard is enabled.
+        """
+        if self.motion_threshold is None and self.scene_change_threshold is None:
+            return None
+        
+        if isinstance(frame, np.ndarray):
+            thumbnail = cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA)
+        else:
+            # GPU-resident frames only bring the thumbnail back to the host
+            thumbnail = cv2.cuda.resize(frame, (64, 64), interpolation=cv2.INTER_AREA).download()
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        
+        previous, self._prev_thumbnail = self._prev_thumbnail, thumbnail
+        if previous is None:
+            return None
+        return cv2.absdiff(thumbnail, previous).mean()
+    
+    def _predict_detections(self):
+        """Extrapolate the last tracked boxes by one frame at constant velocity."""
+        last = self._last_tracked
+        if not isinstance(last, TrackedBatch) or len(last) == 0:
+            return self._last_detections
+        
+        bboxes = last.bboxes.astype(np.float32)
+        previous = self._prev_tracked
+        if isinstance(previous, TrackedBatch) and len(previous) > 0:
+            _, last_index, prev_index = np.intersect1d(last.ids, previous.ids,
+                                                       return_indices=True)
+            bboxes[last_index] += last.bboxes[last_index] - previous.bboxes[prev_index]
+        
+        names = self.detector.get_class_names()
+        return Detections(
+            bboxes=bboxes,
+            confidences=np.asarray(last.confidences, dtype=np.float32),
+            class_ids=last.class_ids,
+            class_names=[names[c] for c in last.class_ids.tolist()]
+        )
+    
+    def _process_detections(self, frame: np.ndarray, detections: List[Dict], 
+                            metadata: Dict, inplace: bool = False) -> Dict[str, Any]:
+        """Track, visualize and post-process a frame with known detections."""
+        detections, tracked_objects, all_trajectories = self._track(frame, detections)
+        return self._render(frame, detections, tracked_objects, all_trajectories,
+                            metadata, inplace)
+    
+    def _track(self, frame: np.ndarray, detections: Optional[List[Dict]]):
+        """Update the tracker and return (detections, tracked_objects, all_trajectories).
+        
+        ``detections`` of None, from a frame skipped by the detector stride,
+        are predicted from the tracker state first.
+        """
+        if detections is None:
+            detections = self._predict_detections()
         
-        # Track objects
         frame_shape = (frame.shape[0], frame.shape[1])
         tracked_objects = self.tracker.update(detections, frame_shape)
-        
-        # Visualize (pass trajectories for dynamic heatmap)
+        self._prev_tracked, self._last_tracked = self._last_tracked, tracked_objects
+        if isinstance(tracked_objects, TrackedBatch):
+            self._accumulate_heat(frame_shape, tracked_objects.centers)
         all_trajectories = self.tracker.get_all_trajectories()
-        vis_frame = self.visualizer.draw_frame(frame, tracked_objects, all_trajectories)
+        return detections, tracked_objects, all_trajectories
+    
+    def _render(self, frame: np.ndarray, detections: List[Dict], tracked_objects,
+                all_trajectories: Dict[int, np.ndarray], metadata: Dict,
+                inplace: bool = False, out: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Draw tracking results onto a frame and apply custom processors."""
+        # Visualize (pass trajectories for dynamic heatmap)
+        if out is None:
+            vis_frame = self.visualizer.draw_frame(frame, tracked_objects, all_trajectories,
+                                                   inplace=inplace)
+        else:
+            vis_frame = self.visualizer.draw_frame(frame, tracked_objects, all_trajectories,
+                                                   out=out)
         
         # Apply custom processors
-        for processor in self.frame_processors:
-            vis_frame = processor(vis_frame, {
-                'detections': detections,
-                'tracked_objects': tracked_objects,
-                'metadata': metadata
-            })
+        vis_frame = self._apply_processors(vis_frame, detections, tracked_objects, metadata)
         
         return {
             'frame': vis_frame,
@@ -77,11 +351,113 @@ class TrackingPipeline:
             'metadata': metadata
         }
     
+    def _skip_processors(self, vis_frame: np.ndarray, detections, tracked_objects,
+                         metadata: Dict) -> np.ndarray:
+        """Return the frame unchanged; used while no processors are registered."""
+        return vis_frame
+    
+    def _run_processors(self, vis_frame: np.ndarray, detections, tracked_objects,
+                        metadata: Dict) -> np.ndarray:
+        """Pass the frame through each custom processor in turn."""
+        for processor in self.frame_processors:
+            vis_frame = processor(vis_frame, {
+                'detections': detections,
+                'tracked_objects': tracked_objects,
+                'metadata': metadata
+            })
+        return vis_frame
+    
+    def process_stream(self,
+                       source: VideoSource,
+                       writer: Optional[cv2.VideoWriter] = None,
+                       on_result: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+                       batch_size: int = 1) -> int:
+        """Run the pipeline over a source with decoding, inference and encoding overlapped.
+        
+        Frames are decoded, detected and tracked on worker threads and
+        written to ``writer`` on an encoder thread. ``on_result`` runs on
+        the calling thread, so it can drive HighGUI preview and keyboard
+        handling. An exception raised by any worker is re-raised here once
+        the workers have stopped.
+        
+        Args:
+            source: Video source to read frames from
+            writer: Optional video writer that receives processed frames.
+                It is not released.
+            on_result: Optional callback called with each result before
+                its frame is written; returning False stops processing
+                after that frame
+            batch_size: Number of frames accumulated per detector call
+            
+        Returns:
+            Number of frames processed, not counting the one that stopped
+            processing
+        """
+        props = source.get_properties()
+        
+        # Decoded frame buffers that are done with, ready to decode into again
+        free_frames = queue.SimpleQueue()
+        
+        encode_thread = None
+        encode_errors = []
+        if writer is not None:
+            encode_q = queue.Queue(maxsize=8)
+            encode_thread = threading.Thread(target=self._encode_loop,
+                                             args=(writer, encode_q, free_frames, encode_errors),
+                                             daemon=True)
+            encode_thread.start()
+        
+        self._start_run()
+        frame_count = 0
+        
+        # The stages already run in parallel, so OpenCV's own worker pool
+        # would only oversubscribe the cores
+        cv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(1)
+        
+        try:
+            # Live sources (no known frame count) drop stale frames.
+            # File sources decode into a fixed ring of frame buffers; live
+            # sources must never wait for one, so theirs stays unbounded
+            live = props.get('frame_count', -1) < 0
+            frame_ring = 0 if live else batch_size + FRAME_RING_SLACK
+            with closing(self._run_threaded(source, props, batch_size,
+                                            free_frames=free_frames,
+                                            frame_ring=frame_ring,
+                                            drop_oldest=live)) as results:
+                for frame, result in results:
+                    # The callback sees the frame before it is handed off,
+                    # since its buffer is reused once it has been written
+                    keep_going = on_result is None or on_result(result) is not False
+                    
+                    if encode_thread is not None:
+                        encode_q.put((result['frame'], frame))
+                    else:
+                        free_frames.put(frame)
+                    
+                    if not keep_going:
+                        break
+                    frame_count += 1
+        finally:
+            cv2.setNumThreads(cv_threads)
+            if encode_thread is not None:
+                # The encoder keeps draining after a failed write, so this
+                # never blocks on a dead consumer
+                encode_q.put(None)
+                encode_thread.join()
+        
+        if encode_errors:
+            raise encode_errors[0]
+        return frame_count
+    
     def process_video(self, 
                      source: VideoSource,
                      output_path: Optional[str] = None,
                      show_preview: bool = True,
-                     progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+                     progress_callback: Optional[Callable[[int, int], None]] = None,
+                     batch_size: int = 1,
+                     encoder: str = 'mp4v',
+                     progress_interval: float = 0.1) -> Dict[str, Any]:
         """Process an entire video from a video source.
         
         Args:
@@ -89,6 +465,10 @@ class TrackingPipeline:
             output_path: Optional path to save output video
             show_preview: Whether to show preview window
             progress_callback: Optional callback for progress updates (frame_num, total_frames)
+            batch_size: Number of frames accumulated per detector call
+            encoder: Output encoder, as accepted by create_video_writer
+            progress_interval: Minimum seconds between progress callbacks.
+                The first and last processed frames are always reported.
             
         Returns:
             Dictionary containing processing results and statistics
@@ -101,47 +481,53 @@ class TrackingPipeline:
         # Setup video writer if output path provided
         out = None
         if output_path:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            out = create_video_writer(output_path, fps, (width, height), encoder=encoder)
         
         frame_count = 0
+        last_progress = float('-inf')
+        reported_frame = -1
+        gpu_frame = _open_gpu_preview('Tracking', (height, width)) if show_preview else None
         
-        try:
-            while True:
-                ret, frame = source.read()
-                if not ret or frame is None:
-                    break
-                
-                # Process frame
-                result = self.process_frame(frame, {
-                    'frame_number': frame_count,
-                    'source_properties': props
-                })
-                
-                vis_frame = result['frame']
-                
-                # Write to output
-                if out is not None:
-                    out.write(vis_frame)
-                
-                # Show preview
-                if show_preview:
+        def handle_result(result):
+            nonlocal frame_count, last_progress, reported_frame
+            vis_frame = result['frame']
+            
+            # Drawing and preview stay on this thread so HighGUI is
+            # driven by it
+            if show_preview:
+                if gpu_frame is not None:
+                    gpu_frame.upload(vis_frame)
+                    cv2.imshow('Tracking', gpu_frame)
+                else:
                     cv2.imshow('Tracking', vis_frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
-                
-                # Progress callback
-                if progress_callback:
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    return False
+            
+            # Progress callback, throttled so fast videos do not
+            # spend per-frame time on reporting
+            if progress_callback:
+                now = time.monotonic()
+                if (now - last_progress >= progress_interval
+                        or frame_count == total_frames - 1):
                     progress_callback(frame_count, total_frames)
-                
-                frame_count += 1
-                
+                    last_progress = now
+                    reported_frame = frame_count
+            
+            frame_count += 1
+        
+        try:
+            frame_count = self.process_stream(source, writer=out, on_result=handle_result,
+                                              batch_size=batch_size)
         finally:
             if out is not None:
                 out.release()
             if show_preview:
                 cv2.destroyAllWindows()
         
+        # The stream can end before the reported frame count, or have none
+        if progress_callback and reported_frame != frame_count - 1:
+            progress_callback(frame_count - 1, total_frames)
+        
         # Get final statistics
         all_trajectories = self.tracker.get_all_trajectories()
         
@@ -152,14 +538,330 @@ class TrackingPipeline:
             'source_properties': props
         }
     
+    def process_video_windowed(self,
+                               source: VideoSource,
+                               window_size: int = 2000,
+                               n_jobs: int = 4,
+                               batch_size: int = 1) -> Dict[str, Any]:
+        """Track a video in parallel temporal windows and stitch the results.
+        
+        Detection runs over the whole video first. Each window of
+        ``window_size`` frames is then tracked by its own ObjectTracker in a
+        worker process, and tracks crossing window boundaries are linked by
+        Hungarian matching on their end/start points. Larger windows leave
+        fewer boundaries to stitch but less work to spread across workers.
+        Nothing is drawn or written, and ``self.tracker`` is left untouched.
+        
+        Args:
+            source: Video source to process
+            window_size: Number of frames tracked per window
+            n_jobs: Number of worker processes; 1 tracks windows inline
+            batch_size: Number of frames accumulated per detector call
+            
+        Returns:
+            Dictionary with the same keys as process_video; trajectories are
+            keyed by stitched track IDs
+        """
+        props = source.get_properties()
+        frame_shape = (props['height'], props['width'])
+        self._start_run()
+        
+        # Detect every frame, keeping only the detections. Frames skipped by
+        # the detector stride cannot be predicted here, since each window
+        # has its own tracker, so they are tracked with no detections
+        all_detections = []
+        batch = []
+        while True:
+            ret, frame = source.read()
+            done = not ret or frame is None
+            if not done:
+                batch.append(frame)
+            if batch and (done or len(batch) == batch_size):
+                if batch_size == 1:
+                    batch_detections = [self._detect(batch[0])]
+                else:
+                    batch_detections = self._detect_batch(batch)
+                all_detections.extend(Detections() if detections is None else detections
+                                      for detections in batch_detections)
+                batch = []
+            if done:
+                break
+        
+        tracker_kwargs = {
+            'max_disappeared': self.tracker.max_disappeared,
+            'max_distance': self.tracker.max_distance
+        }
+        window_starts = list(range(0, len(all_detections), window_size))
+        window_args = (
+            window_starts,
+            [all_detections[start:start + window_size] for start in window_starts],
+            [frame_shape] * len(window_starts),
+            [tracker_kwargs] * len(window_starts)
+        )
+        
+        if n_jobs > 1 and len(window_starts) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                windows = list(executor.map(track_window, *window_args))
+        else:
+            windows = list(map(track_window, *window_args))
+        
+        trajectories = link_tracklets(windows, window_starts,
+                                      tracker_kwargs['max_disappeared'],
+                                      tracker_kwargs['max_distance'])
+        
+        return {
+            'frames_processed': len(all_detections),
+            'total_objects_tracked': len(trajectories),
+            'trajectories': trajectories,
+            'source_properties': props
+        }
+    
+    def _encode_loop(self, out: cv2.VideoWriter, frames: queue.Queue,
+                     free_frames: queue.SimpleQueue, errors: List[Exception]) -> None:
+        """Write queued (vis_frame, frame) pairs until a None sentinel.
+        
+        Each decoded frame buffer is released to ``free_frames`` once written.
+        After a failed write the queue is still drained, so the producer
+        never blocks on it.
+        """
+        while True:
+            item = frames.get()
+            if item is None:
+                return
+            vis_frame, frame = item
+            if not errors:
+                try:
+                    out.write(vis_frame)
+                except Exception as e:
+                    errors.append(e)
+            free_frames.put(frame)
+    
+    def _run_threaded(self, source: VideoSource, props: Dict[str, Any],
+                      batch_size: int = 1, prefetch: int = 4,
+                      free_frames: Optional[queue.SimpleQueue] = None,
+                      frame_ring: int = 0,
+                      drop_oldest: bool = False
+                      ) -> Iterator[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Yield processed frames, overlapping decoding and inference.
+        
+        A reader thread decodes frames and an inference thread runs detection
+        and tracking, each handing results over through a bounded queue.
+        With ``batch_size`` > 1, frames are collected and detected in a single
+        model call, flushing a partial batch at end of stream. The
+        tracker is only touched by the inference thread while this runs.
+        Drawing and custom processors run on the consuming thread; tasks
+        that need the tracker are passed to the inference thread with
+        call_between_frames. Closing the generator stops both workers.
+        
+        With ``free_frames``, the reader decodes into buffers taken from that
+        queue, so steady state decoding allocates nothing. The consumer
+        puts each yielded frame back once nothing references it anymore.
+        A ``frame_ring`` above zero caps how many buffers the reader lets
+        the source allocate; once that many are in flight it waits for one
+        to be released, so a long video cycles through the same few
+        cache-warm buffers instead of growing the pool to fill every queue.
+        
+        With ``drop_oldest``, the reader never blocks on a full queue and
+        discards the oldest undetected frame instead, so live sources stay
+        current when inference falls behind.
+        
+        Args:
+            source: Video source to read frames from
+            props: Source properties attached to each frame's metadata
+            batch_size: Number of frames accumulated per detector call
+            prefetch: Maximum number of items buffered between stages
+            free_frames: Queue of frame buffers released by the consumer
+            frame_ring: Maximum number of frame buffers, or 0 for no limit
+            drop_oldest: Drop stale frames instead of waiting for inference
+            
+        Yields:
+            (frame, result) pairs of the decoded frame buffer and the result
+            in the same format as process_frame
+        """
+        read_q = queue.Queue(maxsize=max(prefetch, batch_size))
+        track_q = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        errors = []
+        
+        def put(q, item):
+            # Give up once the consumer has stopped so workers never block forever
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def put_latest(q, item):
+            # Live sources never wait on inference: the stalest frame is dropped
+            while True:
+                try:
+                    q.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+                try:
+                    _, dropped = q.get_nowait()
+                except queue.Empty:
+                    continue
+                if free_frames is not None:
+                    free_frames.put(dropped)
+        
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return None
+        
+        # Recycled buffers still bound how many frames are in flight when
+        # the source cannot decode into them; they are just dropped
+        reads_into = free_frames is not None and _reads_into(source)
+        
+        def read_loop():
+            try:
+                frame_number = 0
+                allocated = 0
+                while not stop.is_set():
+                    buffer = None
+                    if free_frames is not None:
+                        try:
+                            buffer = free_frames.get_nowait()
+                        except queue.Empty:
+                            if frame_ring and allocated >= frame_ring:
+                                buffer = get(free_frames)
+                                if buffer is None:
+                                    break
+                            else:
+                                # The source allocates a new buffer for this read
+                                allocated += 1
+                    if buffer is not None and reads_into:
+                        ret, frame = source.read(out=buffer)
+                    else:
+                        ret, frame = source.read()
+                    if not ret or frame is None:
+                        break
+                    if drop_oldest:
+                        put_latest(read_q, (frame_number, frame))
+                    elif not put(read_q, (frame_number, frame)):
+                        break
+                    frame_number += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(read_q, None)
+        
+        def track_loop():
+            try:
+                pending = deque()
+                while True:
+                    self._run_tasks(tasks)
+                    item = get(read_q)
+                    if item is not None:
+                        pending.append(item)
+                        if len(pending) < batch_size:
+                            continue
+                    
+                    if not pending:
+                        break
+                    if batch_size == 1:
+                        batch_detections = [self._detect(pending[0][1])]
+                    else:
+                        batch_detections = self._detect_batch([frame for _, frame in pending])
+                    
+                    # The tracker is stateful, so frames are tracked in order
+                    for detections in batch_detections:
+                        frame_number, frame = pending.popleft()
+                        detections, tracked_objects, all_trajectories = self._track(
+                            frame, detections)
+                        tracked_objects, all_trajectories = self._snapshot(
+                            tracked_objects, all_trajectories)
+                        if not put(track_q, (frame_number, frame, detections,
+                                             tracked_objects, all_trajectories)):
+                            return
+                    if item is None:
+                        break
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(track_q, None)
+        
+        tasks = queue.SimpleQueue()
+        self._between_frames = tasks
+        workers = [threading.Thread(target=read_loop, daemon=True),
+                   threading.Thread(target=track_loop, daemon=True)]
+        for worker in workers:
+            worker.start()
+        
+        try:
+            while True:
+                item = track_q.get()
+                if item is None:
+                    break
+                frame_number, frame, detections, tracked_objects, all_trajectories = item
+                metadata = {'frame_number': frame_number, 'source_properties': props}
+                # Frames are freshly decoded, so draw on them directly
+                yield frame, self._render(frame, detections, tracked_objects,
+                                          all_trajectories, metadata, inplace=True)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+            # The tracker is this thread's again, so late tasks run here
+            self._between_frames = None
+            self._run_tasks(tasks)
+        
+        if errors:
+            raise errors[0]
+    
+    def _snapshot(self, tracked_objects, all_trajectories: Dict[int, np.ndarray]):
+        """Detach trajectories from tracker storage before handing them to another thread.
+        
+        Unbounded trajectory buffers only ever append past the end of
+        previously returned views, so those views stay valid. Bounded ring
+        buffers overwrite in place, so their views are copied.
+        """
+        if getattr(self.tracker, 'trajectory_length', None) is None:
+            return tracked_objects, all_trajectories
+        
+        if isinstance(tracked_objects, TrackedBatch):
+            tracked_objects.trajectories = [t.copy() for t in tracked_objects.trajectories]
+        return tracked_objects, {k: v.copy() for k, v in all_trajectories.items()}
+    
     def generate_heatmap(self, frame_shape: Tuple[int, int]) -> np.ndarray:
         """Generate a heatmap from all tracked trajectories.
         
+        Frames tracked by this pipeline are counted as they go, so this
+        does not revisit the trajectory history.
+        
         Args:
             frame_shape: Shape of the frame (height, width)
             
         Returns:
             Heatmap image as numpy array
         """
+        accum = self._heatmap_accum
+        if accum is not None and accum.shape == tuple(frame_shape[:2]):
+            # Centers were counted as they were tracked, so only the blur
+            # and colormap are left to do
+            return self.visualizer.render_heatmap(accum)
+        
         trajectories = self.tracker.get_all_trajectories()
-        return self.visualizer.create_heatmap(frame_shape, trajectories)
\ No newline at end of file
+        return self.visualizer.create_heatmap(frame_shape, trajectories)
+    
+    def reset_heatmap(self) -> None:
+        """Clear the heatmap accumulator, e.g. after resetting the tracker."""
+        self._heatmap_accum = None
+    
+    def _accumulate_heat(self, frame_shape: Tuple[int, int], centers: np.ndarray) -> None:
+        """Count one frame's tracked centers into the heatmap accumulator."""
+        if self._heatmap_accum is None or self._heatmap_accum.shape != frame_shape:
+            self._heatmap_accum = np.zeros(frame_shape, dtype=np.float32)
+        if len(centers) == 0:
+            return
+        
+        xs, ys = centers[:, 0], centers[:, 1]
+        inside = (xs >= 0) & (xs < frame_shape[1]) & (ys >= 0) & (ys < frame_shape[0])
+        np.add.at(self._heatmap_accum, (ys[inside], xs[inside]), 1.0)
\ No newline at end of file
@@ -0,0 +1,98 @@
+from typing import Dict, List, Tuple, Any
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import cdist
+
+from ..core import ObjectTracker
+
+
+# A tracklet is (first_frame, last_frame, points) for one track within a window
+Tracklet = Tuple[int, int, np.ndarray]
+
+
+def track_window(start_frame: int, window_detections: List[Any],
+                 frame_shape: Tuple[int, int],
+                 tracker_kwargs: Dict[str, Any]) -> Dict[int, Tracklet]:
+    """Track one temporal window with a fresh tracker.
+    
+    Runs in a worker process, so it only takes picklable arguments.
+    
+    Args:
+        start_frame: Index of the window's first frame in the video
+        window_detections: Detections for each frame of the window, in order
+        frame_shape: Shape of the frames (height, width)
+        tracker_kwargs: Keyword arguments for ObjectTracker
+    
+    Returns:
+        Tracklets keyed by the window-local track ID
+    """
+    tracker = ObjectTracker(**tracker_kwargs)
+    first_seen: Dict[int, int] = {}
+    last_seen: Dict[int, int] = {}
+    
+    for offset, detections in enumerate(window_detections):
+        frame_number = start_frame + offset
+        for track_id in tracker.update(detections, frame_shape).ids.tolist():
+            first_seen.setdefault(track_id, frame_number)
+            last_seen[track_id] = frame_number
+    
+    return {
+        track_id: (first_seen[track_id], last_seen[track_id], trajectory.view().copy())
+        for track_id, trajectory in tracker.tracks.items()
+    }
+
+
+def link_tracklets(windows: List[Dict[int, Tracklet]], window_starts: List[int],
+                   max_gap: int, max_distance: float) -> Dict[int, np.ndarray]:
+    """Stitch per-window tracklets into video-wide trajectories.
+    
+    Tracklets that end within ``max_gap`` frames of a window boundary are
+    matched to tracklets that start within ``max_gap`` frames after it by
+    minimizing the distance between the end and start points (Hungarian
+    assignment). Pairs further apart than ``max_distance`` stay separate.
+    
+    Args:
+        windows: Tracklets for each window, in temporal order
+        window_starts: First frame index of each window
+        max_gap: Frames a track may be missing across a boundary
+        max_distance: Maximum pixel distance for linking two tracklets
+    
+    Returns:
+        Dictionary mapping global track IDs to concatenated trajectories
+    """
+    segments: Dict[int, List[np.ndarray]] = {}
+    previous: Dict[int, int] = {}
+    previous_tracklets: Dict[int, Tracklet] = {}
+    next_id = 1
+    
+    for index, tracklets in enumerate(windows):
+        global_ids: Dict[int, int] = {}
+        
+        if index > 0 and previous_tracklets and tracklets:
+            boundary = window_starts[index]
+            ending = [local_id for local_id, (_, last, _) in previous_tracklets.items()
+                      if last >= boundary - max_gap]
+            starting = [local_id for local_id, (first, _, _) in tracklets.items()
+                        if first <= boundary + max_gap]
+            
+            if ending and starting:
+                end_points = np.array([previous_tracklets[i][2][-1] for i in ending], dtype=float)
+                start_points = np.array([tracklets[i][2][0] for i in starting], dtype=float)
+                # cdist computes the pairwise distances in one C loop,
+                # without the (N, M, 2) difference array broadcasting builds
+                cost = cdist(end_points, start_points)
+                
+                for row, col in zip(*linear_sum_assignment(cost)):
+                    if cost[row, col] <= max_distance:
+                        global_ids[starting[col]] = previous[ending[row]]
+        
+        for local_id, (_, _, points) in tracklets.items():
+            if local_id not in global_ids:
+                global_ids[local_id] = next_id
+                next_id += 1
+            segments.setdefault(global_ids[local_id], []).append(points)
+        
+        previous = global_ids
+        previous_tracklets = tracklets
+    
+    return {track_id: np.concatenate(parts) for track_id, parts in segments.items()}
\ No newline at end of file
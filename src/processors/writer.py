@@ -0,0 +1,91 @@
+import sys
+import cv2
+from pathlib import Path
+from typing import Tuple, Union
+
+
+# GStreamer H.264 encoder elements for each hardware backend
+GSTREAMER_ENCODERS = {
+    'nvenc': 'nvh264enc',
+    'vaapi': 'vaapih264enc',
+    'videotoolbox': 'vtenc_h264',
+    'x264': 'x264enc speed-preset=ultrafast tune=zerolatency',
+}
+
+
+# FFmpeg-backend H.264 writer with OpenCV's hardware acceleration
+# (NVENC, VAAPI, QSV, ... whichever FFmpeg finds)
+FFMPEG_ENCODER = 'ffmpeg'
+
+
+# The H.264 encoders write MP4 (mp4mux, or FFmpeg picking the container
+# from this suffix); other suffixes keep the software ``codec`` writer
+H264_SUFFIXES = ('.mp4', '.m4v')
+
+
+def _auto_encoders() -> Tuple[str, ...]:
+    """Encoders to try, in order, when the encoder is 'auto'."""
+    if sys.platform == 'darwin':
+        return ('videotoolbox', FFMPEG_ENCODER, 'x264')
+    return ('nvenc', 'vaapi', FFMPEG_ENCODER, 'x264')
+
+
+def _gstreamer_pipeline(encoder: str, output_path: str) -> str:
+    """Build a GStreamer pipeline that encodes BGR frames to an MP4 file."""
+    # Quote the path so spaces and '!' are not parsed as pipeline syntax
+    location = output_path.replace('\\', '\\\\').replace('"', '\\"')
+    return (f"appsrc ! videoconvert ! {GSTREAMER_ENCODERS[encoder]} ! "
+            f'h264parse ! mp4mux ! filesink location="{location}"')
+
+
+def create_video_writer(output_path: Union[str, Path],
+                        fps: float,
+                        frame_size: Tuple[int, int],
+                        encoder: str = 'mp4v',
+                        codec: str = 'mp4v') -> cv2.VideoWriter:
+    """Create a video writer, preferring a hardware H.264 encoder.
+
+    Args:
+        output_path: Output video file path
+        fps: Output frame rate
+        frame_size: Frame size as (width, height)
+        encoder: 'auto', 'nvenc', 'vaapi', 'videotoolbox', 'x264', 'ffmpeg'
+            or 'mp4v'. GStreamer encoders fall back to the software
+            ``codec`` writer when OpenCV lacks GStreamer support or the
+            element is missing; 'ffmpeg' does the same when FFmpeg has
+            no usable hardware H.264 encoder. H.264 encoders are only
+            used for .mp4 and .m4v outputs.
+        codec: FourCC used for the software fallback
+
+    Returns:
+        An opened cv2.VideoWriter
+    """
+    output_path = str(output_path)
+
+    if encoder not in ('auto', 'mp4v', FFMPEG_ENCODER) and encoder not in GSTREAMER_ENCODERS:
+        raise ValueError(f"Unknown encoder: {encoder}")
+
+    if Path(output_path).suffix.lower() not in H264_SUFFIXES:
+        candidates = ()
+    elif encoder == 'auto':
+        candidates = _auto_encoders()
+    elif encoder in GSTREAMER_ENCODERS or encoder == FFMPEG_ENCODER:
+        candidates = (encoder,)
+    else:
+        candidates = ()
+
+    for name in candidates:
+        if name == FFMPEG_ENCODER:
+            writer = cv2.VideoWriter(output_path, cv2.CAP_FFMPEG,
+                                     cv2.VideoWriter_fourcc(*'avc1'), fps, frame_size,
+                                     [cv2.VIDEOWRITER_PROP_HW_ACCELERATION,
+                                      cv2.VIDEO_ACCELERATION_ANY])
+        else:
+            writer = cv2.VideoWriter(_gstreamer_pipeline(name, output_path),
+                                     cv2.CAP_GSTREAMER, 0, fps, frame_size)
+        if writer.isOpened():
+            return writer
+        writer.release()
+
+    fourcc = cv2.VideoWriter_fourcc(*codec)
+    return cv2.VideoWriter(output_path, fourcc, fps, frame_size)
@@ -1,5 +1,7 @@
 from .base import VideoSource
 from .video import VideoFileSource
 from .webcam import WebcamSource
+from .prefetch import PrefetchingVideoSource
+from .cuda import CudaVideoFileSource
 
-__all__ = ['VideoSource', 'VideoFileSource', 'WebcamSource']
\ No newline at end of file
+__all__ = ['VideoSource', 'VideoFileSource', 'WebcamSource', 'PrefetchingVideoSource', 'CudaVideoFileSource']
\ No newline at end of file
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple, Dict, Any
+import cv2
 import numpy as np
 
 
+# VideoCapture properties by lowercase name (e.g. 'frame_width'), resolved once
+CAP_PROPS = {name[len('CAP_PROP_'):].lower(): getattr(cv2, name)
+             for name in dir(cv2) if name.startswith('CAP_PROP_')}
+
+
 class VideoSource(ABC):
     """Abstract base class for video sources."""
     
@@ -12,9 +18,14 @@ class VideoSource(ABC):
         pass
     
     @abstractmethod
-    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
         """Read a frame from the video source.
         
+        Args:
+            out: Optional preallocated frame buffer to decode into. It is
+                used when it matches the frame's shape and dtype; sources
+                that cannot decode in place return a new array instead.
+        
         Returns:
             Tuple of (success, frame) where success is a boolean
             and frame is a numpy array or None if unsuccessful.
@@ -0,0 +1,82 @@
+import cv2
+from pathlib import Path
+from typing import Optional, Tuple, Dict, Any
+
+from .base import VideoSource
+
+
+def cuda_decoding_available() -> bool:
+    """Check whether OpenCV can decode video on a CUDA device."""
+    return (hasattr(cv2, 'cudacodec') and hasattr(cv2, 'cuda')
+            and cv2.cuda.getCudaEnabledDeviceCount() > 0)
+
+
+class CudaVideoFileSource(VideoSource):
+    """Video file source that decodes on the GPU with cv2.cudacodec.
+    
+    Frames are returned as BGR cv2.cuda_GpuMat objects that never leave
+    device memory, so YOLODetector can consume them without a host to
+    device upload. They cannot be drawn on or written directly, which
+    makes this source suited to detection-only runs such as
+    TrackingPipeline.process_video_windowed.
+    """
+    
+    def __init__(self, file_path: str):
+        """Initialize CUDA video file source.
+        
+        Args:
+            file_path: Path to the video file
+        """
+        self.file_path = Path(file_path)
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Video file not found: {file_path}")
+        if not cuda_decoding_available():
+            raise RuntimeError("CUDA video decoding requires OpenCV built with cudacodec "
+                               "and a CUDA device")
+        
+        # cudacodec does not report container properties, so read them once
+        cap = cv2.VideoCapture(str(self.file_path))
+        self._properties = {
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': int(cap.get(cv2.CAP_PROP_FPS)),
+            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        }
+        cap.release()
+        
+        self._reader = cv2.cudacodec.createVideoReader(str(self.file_path))
+        self._reader.set(cv2.cudacodec.ColorFormat_BGR)
+        self._frame_index = 0
+    
+    def read(self, out: Optional[Any] = None) -> Tuple[bool, Optional[Any]]:
+        """Decode the next frame into a GpuMat, reusing ``out`` if it is one."""
+        if self._reader is None:
+            return False, None
+        
+        if isinstance(out, cv2.cuda_GpuMat):
+            ret, frame = self._reader.nextFrame(out)
+        else:
+            ret, frame = self._reader.nextFrame()
+        if not ret:
+            return False, None
+        
+        self._frame_index += 1
+        return True, frame
+    
+    def release(self) -> None:
+        """Release the GPU decoder."""
+        self._reader = None
+    
+    def get_properties(self) -> Dict[str, Any]:
+        """Get video properties."""
+        return {
+            **self._properties,
+            'current_frame': self._frame_index,
+            'source_type': 'file',
+            'source_path': str(self.file_path)
+        }
+    
+    @property
+    def is_open(self) -> bool:
+        """Check if the decoder is open."""
+        return self._reader is not None
\ No newline at end of file
@@ -0,0 +1,93 @@
+import queue
+import threading
+from typing import Optional, Tuple, Dict, Any
+import numpy as np
+
+from .base import VideoSource
+
+
+class PrefetchingVideoSource(VideoSource):
+    """Video source wrapper that decodes frames ahead on a background thread."""
+    
+    def __init__(self, source: VideoSource, prefetch: int = 8):
+        """Initialize prefetching wrapper.
+        
+        Args:
+            source: Video source to read from. It must not be used directly
+                while wrapped, since its reads happen on the decoder thread.
+            prefetch: Maximum number of decoded frames buffered ahead
+        """
+        self.source = source
+        # Query properties before the decoder thread starts using the capture
+        self._properties = source.get_properties()
+        self._frames_read = 0
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._exhausted = False
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._thread.start()
+    
+    def _reader_loop(self) -> None:
+        """Decode frames into the queue until the source ends or is released."""
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.source.read()
+                if not ret or frame is None:
+                    break
+                if not self._put((True, frame)):
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(None)
+    
+    def _put(self, item) -> bool:
+        """Queue an item, giving up once the wrapper is released."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Return the next decoded frame.
+        
+        ``out`` is ignored, since frames are decoded ahead of the call.
+        """
+        if self._exhausted:
+            return False, None
+        
+        item = self._queue.get()
+        if item is None:
+            self._exhausted = True
+            if self._error is not None:
+                raise self._error
+            return False, None
+        
+        self._frames_read += 1
+        return item
+    
+    def release(self) -> None:
+        """Stop the decoder thread and release the wrapped source."""
+        self._stop.set()
+        self._thread.join()
+        self.source.release()
+    
+    def get_properties(self) -> Dict[str, Any]:
+        """Get properties of the wrapped source.
+        
+        ``current_frame`` counts frames returned by read(), not frames
+        decoded ahead.
+        """
+        properties = dict(self._properties)
+        if 'current_frame' in properties:
+            properties['current_frame'] += self._frames_read
+        return properties
+    
+    @property
+    def is_open(self) -> bool:
+        """Check if frames remain to be read."""
+        return not self._exhausted and not self._stop.is_set()
\ No newline at end of file
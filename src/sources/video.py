@@ -1,60 +1,178 @@
 import cv2
+import itertools
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Union, BinaryIO
 import numpy as np
 
-from .base import VideoSource
+from .base import VideoSource, CAP_PROPS
+
+
+# Decoding backends; 'pyav' and 'decord' are optional dependencies
+VIDEO_BACKENDS = ('opencv', 'pyav', 'decord')
 
 
 class VideoFileSource(VideoSource):
     """Video file source implementation."""
     
-    def __init__(self, file_path: str, **kwargs):
+    def __init__(self, file_path: Union[str, BinaryIO], backend: str = 'opencv',
+                 hwaccel: Optional[str] = None, **kwargs):
         """Initialize video file source.
         
         Args:
-            file_path: Path to the video file
+            file_path: Path to the video file. The pyav backend also accepts
+                a readable binary file object, e.g. an in-memory upload.
+            backend: Decoding backend, one of 'opencv', 'pyav' or 'decord'
+            hwaccel: Hardware decoder (e.g. 'cuda', 'vaapi'). With the opencv
+                backend, 'vaapi', 'd3d11', 'mfx' and 'drm' select that API
+                and any other value lets FFmpeg pick one; None decodes on
+                the CPU
             **kwargs: Additional OpenCV VideoCapture parameters
         """
+        if backend not in VIDEO_BACKENDS:
+            raise ValueError(f"Unsupported video backend: {backend}")
+        
+        self._file_obj = None
+        if hasattr(file_path, 'read'):
+            if backend != 'pyav':
+                raise ValueError("File objects are only supported by the pyav backend")
+            self._file_obj = file_path
+            file_path = getattr(file_path, 'name', '<stream>')
+        
         self.file_path = Path(file_path)
-        if not self.file_path.exists():
+        if self._file_obj is None and not self.file_path.exists():
             raise FileNotFoundError(f"Video file not found: {file_path}")
         
-        self.cap = cv2.VideoCapture(str(self.file_path))
+        self.backend = backend
+        self.cap = None
+        self._reader = None
+        self._frame_index = 0
+        
+        if backend == 'pyav':
+            self._open_pyav(hwaccel)
+            return
+        if backend == 'decord':
+            self._open_decord(hwaccel)
+            return
+        
+        self.cap = self._open_opencv(hwaccel)
         if not self.cap.isOpened():
             raise RuntimeError(f"Failed to open video file: {file_path}")
         
         # Apply any additional parameters
         for key, value in kwargs.items():
-            if hasattr(cv2, f'CAP_PROP_{key.upper()}'):
-                prop = getattr(cv2, f'CAP_PROP_{key.upper()}')
+            prop = CAP_PROPS.get(key.lower())
+            if prop is not None:
                 self.cap.set(prop, value)
+        
+        # Container properties do not change once opened, so query them once
+        self._properties = {
+            'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': int(self.cap.get(cv2.CAP_PROP_FPS)),
+            'frame_count': int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'source_type': 'file',
+            'source_path': str(self.file_path)
+        }
+    
+    def _open_opencv(self, hwaccel: Optional[str]) -> cv2.VideoCapture:
+        """Open the file with OpenCV, preferring hardware decoding if requested.
+        
+        Falls back to the default capture when the FFmpeg backend cannot
+        open the file with hardware acceleration.
+        """
+        if hwaccel is not None:
+            acceleration = getattr(cv2, f'VIDEO_ACCELERATION_{hwaccel.upper()}',
+                                   cv2.VIDEO_ACCELERATION_ANY)
+            cap = cv2.VideoCapture(str(self.file_path), cv2.CAP_FFMPEG,
+                                   [cv2.CAP_PROP_HW_ACCELERATION, acceleration])
+            if cap.isOpened():
+                return cap
+            cap.release()
+        return cv2.VideoCapture(str(self.file_path))
     
-    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
-        """Read a frame from the video file."""
-        ret, frame = self.cap.read()
+    def _open_pyav(self, hwaccel: Optional[str]) -> None:
+        """Open the file with PyAV, optionally on a hardware decoder."""
+        import av
+        
+        options = {}
+        if hwaccel is not None:
+            from av.codec.hwaccel import HWAccel
+            options['hwaccel'] = HWAccel(device_type=hwaccel)
+        
+        source = self._file_obj if self._file_obj is not None else str(self.file_path)
+        self._reader = av.open(source, **options)
+        self._stream = self._reader.streams.video[0]
+        self._stream.thread_type = 'AUTO'
+        self._frames = self._reader.decode(self._stream)
+    
+    def _open_decord(self, hwaccel: Optional[str]) -> None:
+        """Open the file with decord, optionally decoding on the GPU."""
+        import decord
+        
+        ctx = decord.gpu(0) if hwaccel is not None else decord.cpu(0)
+        self._reader = decord.VideoReader(str(self.file_path), ctx=ctx)
+        self._frame_shape = self._reader[0].shape[:2] if len(self._reader) else (0, 0)
+    
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Read a frame from the video file, into ``out`` if given."""
+        if self.backend == 'pyav':
+            frame = next(self._frames, None)
+            if frame is None:
+                return False, None
+            self._frame_index += 1
+            return True, frame.to_ndarray(format='bgr24')
+        
+        if self.backend == 'decord':
+            if self._frame_index >= len(self._reader):
+                return False, None
+            frame = self._reader[self._frame_index].asnumpy()
+            self._frame_index += 1
+            return True, cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=out)
+        
+        ret, frame = self.cap.read(out)
         return ret, frame if ret else None
     
     def release(self) -> None:
         """Release the video capture object."""
         if self.cap is not None:
             self.cap.release()
+        if self.backend == 'pyav' and self._reader is not None:
+            self._reader.close()
+        self._reader = None
     
     def get_properties(self) -> Dict[str, Any]:
         """Get video properties."""
-        return {
-            'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-            'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-            'fps': int(self.cap.get(cv2.CAP_PROP_FPS)),
-            'frame_count': int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-            'current_frame': int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)),
-            'source_type': 'file',
-            'source_path': str(self.file_path)
-        }
+        if self.backend == 'pyav':
+            codec = self._stream.codec_context
+            return {
+                'width': codec.width,
+                'height': codec.height,
+                'fps': int(float(self._stream.average_rate or 0)),
+                'frame_count': self._stream.frames,
+                'current_frame': self._frame_index,
+                'source_type': 'file',
+                'source_path': str(self.file_path)
+            }
+        if self.backend == 'decord':
+            height, width = self._frame_shape
+            return {
+                'width': width,
+                'height': height,
+                'fps': int(self._reader.get_avg_fps()),
+                'frame_count': len(self._reader),
+                'current_frame': self._frame_index,
+                'source_type': 'file',
+                'source_path': str(self.file_path)
+            }
+        
+        return {**self._properties,
+                'current_frame': int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))}
     
     @property
     def is_open(self) -> bool:
         """Check if video capture is open."""
+        if self.backend != 'opencv':
+            return self._reader is not None
         return self.cap is not None and self.cap.isOpened()
     
     def seek(self, frame_number: int) -> bool:
@@ -66,4 +184,26 @@ class VideoFileSource(VideoSource):
         Returns:
             True if successful, False otherwise
         """
+        if self.backend == 'decord':
+            if not 0 <= frame_number < len(self._reader):
+                return False
+            self._frame_index = frame_number
+            return True
+        
+        if self.backend == 'pyav':
+            # Seek to the preceding keyframe, then decode up to the target
+            fps = self._stream.average_rate
+            time_base = self._stream.time_base
+            if not fps or time_base is None:
+                return False
+            target = round(frame_number / float(fps) / float(time_base))
+            self._reader.seek(target, stream=self._stream)
+            self._frames = self._reader.decode(self._stream)
+            for frame in self._frames:
+                if frame.pts is not None and frame.pts >= target:
+                    self._frames = itertools.chain([frame], self._frames)
+                    self._frame_index = frame_number
+                    return True
+            return False
+        
         return self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
\ No newline at end of file
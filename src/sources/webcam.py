@@ -1,18 +1,25 @@
+import queue
+import threading
 import cv2
 from typing import Optional, Tuple, Dict, Any
 import numpy as np
 
-from .base import VideoSource
+from .base import VideoSource, CAP_PROPS
 
 
 class WebcamSource(VideoSource):
     """Webcam source implementation."""
     
-    def __init__(self, camera_index: int = 0, **kwargs):
+    def __init__(self, camera_index: int = 0, latest_only: bool = False, **kwargs):
         """Initialize webcam source.
         
         Args:
             camera_index: Camera device index (default: 0)
+            latest_only: Grab frames continuously on a background thread and
+                have read() return only the most recent one, dropping frames
+                that were not consumed in time. This keeps live processing
+                from falling behind the camera when it is slower than the
+                capture rate.
             **kwargs: Additional OpenCV VideoCapture parameters
         """
         self.camera_index = camera_index
@@ -23,22 +30,80 @@ class WebcamSource(VideoSource):
         
         # Apply any additional parameters
         for key, value in kwargs.items():
-            if hasattr(cv2, f'CAP_PROP_{key.upper()}'):
-                prop = getattr(cv2, f'CAP_PROP_{key.upper()}')
+            prop = CAP_PROPS.get(key.lower())
+            if prop is not None:
                 self.cap.set(prop, value)
+        
+        self.latest_only = latest_only
+        self._grabber: Optional[threading.Thread] = None
+        if latest_only:
+            # Query properties before the grabber thread starts using the capture
+            self._properties = self._query_properties()
+            self._frames_read = 0
+            self._exhausted = False
+            self._latest = queue.Queue(maxsize=1)
+            self._stop = threading.Event()
+            self._grabber = threading.Thread(target=self._grab_loop, daemon=True)
+            self._grabber.start()
+    
+    def _grab_loop(self) -> None:
+        """Keep only the newest captured frame until the camera stops or is released."""
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.cap.read()
+                if not ret or frame is None:
+                    break
+                self._put_latest(frame)
+        finally:
+            self._put_latest(None)
     
-    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
-        """Read a frame from the webcam."""
-        ret, frame = self.cap.read()
-        return ret, frame if ret else None
+    def _put_latest(self, item) -> None:
+        """Replace any unread frame with ``item``."""
+        try:
+            self._latest.get_nowait()
+        except queue.Empty:
+            pass
+        # This thread is the only producer, so the slot is free now
+        self._latest.put_nowait(item)
+    
+    def read(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Read a frame from the webcam, into ``out`` if given.
+        
+        With ``latest_only``, this waits for a frame newer than the last
+        one returned and ``out`` is ignored.
+        """
+        if self._grabber is None:
+            ret, frame = self.cap.read(out)
+            return ret, frame if ret else None
+        
+        if self._exhausted:
+            return False, None
+        frame = self._latest.get()
+        if frame is None:
+            self._exhausted = True
+            return False, None
+        self._frames_read += 1
+        return True, frame
     
     def release(self) -> None:
         """Release the video capture object."""
+        if self._grabber is not None:
+            self._stop.set()
+            self._grabber.join()
         if self.cap is not None:
             self.cap.release()
     
     def get_properties(self) -> Dict[str, Any]:
-        """Get webcam properties."""
+        """Get webcam properties.
+        
+        With ``latest_only``, ``current_frame`` counts frames returned by
+        read(), not frames grabbed from the camera.
+        """
+        if self._grabber is not None:
+            return {**self._properties, 'current_frame': self._frames_read}
+        return self._query_properties()
+    
+    def _query_properties(self) -> Dict[str, Any]:
         return {
             'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
             'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
@@ -52,4 +117,6 @@ class WebcamSource(VideoSource):
     @property
     def is_open(self) -> bool:
         """Check if video capture is open."""
+        if self._grabber is not None and self._exhausted:
+            return False
         return self.cap is not None and self.cap.isOpened()
\ No newline at end of file
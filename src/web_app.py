@@ -7,16 +7,26 @@ import streamlit as st
 import cv2
 import numpy as np
 import tempfile
+import shutil
+import time
 import yaml
 from datetime import datetime
 import io
 from PIL import Image
 
-from src.sources import VideoFileSource, WebcamSource
+from src.sources import VideoFileSource, WebcamSource, PrefetchingVideoSource
 from src.core import YOLODetector, ObjectTracker, TrajectoryVisualizer
 from src.processors import TrackingPipeline
 
 
+# Streamlit previews are downscaled to this width and throttled to this interval
+PREVIEW_WIDTH = 480
+PREVIEW_INTERVAL = 0.1  # seconds
+PREVIEW_JPEG_QUALITY = 70
+
+FOURCC_MP4V = cv2.VideoWriter_fourcc(*'mp4v')
+
+
 def load_config():
     """Load default configuration."""
     with open('config/config.yaml', 'r') as f:
@@ -27,12 +37,20 @@ def create_pipeline(config):
     """Create tracking pipeline from configuration."""
     detector = YOLODetector(
         model_path=config['detector']['model_path'],
-        device=config['detector']['device']
+        device=config['detector']['device'],
+        precision=config['detector'].get('precision', 'fp16'),
+        export_format=config['detector'].get('export_format'),
+        calibration_data=config['detector'].get('calibration_data'),
+        imgsz=config['detector'].get('imgsz', 640),
+        compile_model=config['detector'].get('compile', False),
+        iou_threshold=config['detector'].get('iou_threshold', 0.7),
+        max_det=config['detector'].get('max_det', 300)
     )
     
     tracker = ObjectTracker(
         max_disappeared=config['tracker']['max_disappeared'],
-        max_distance=config['tracker']['max_distance']
+        max_distance=config['tracker']['max_distance'],
+        trajectory_length=config['tracker'].get('trajectory_length')
     )
     
     visualizer = TrajectoryVisualizer(
@@ -44,18 +62,46 @@ def create_pipeline(config):
         show_trajectory=config['visualizer']['show_trajectory'],
         show_heatmap=config['visualizer'].get('show_heatmap', False),
         heatmap_alpha=config['visualizer'].get('heatmap_alpha', 0.6),
-        heatmap_update_interval=config['visualizer'].get('heatmap_update_interval', 10)
+        heatmap_update_interval=config['visualizer'].get('heatmap_update_interval', 10),
+        use_opencl=config['visualizer'].get('use_opencl', False)
     )
     
-    return TrackingPipeline(detector, tracker, visualizer)
+    return TrackingPipeline(
+        detector, tracker, visualizer,
+        motion_threshold=config['detector'].get('motion_threshold'),
+        detector_stride=config['detector'].get('stride', 1),
+        scene_change_threshold=config['detector'].get('scene_change_threshold')
+    )
+
+
+def make_preview(frame, width=PREVIEW_WIDTH):
+    """Downscale a BGR frame for display and encode it as JPEG bytes.
+    
+    Streamlit sends encoded images as-is, so it neither re-encodes the
+    frame as PNG nor resizes it; the JPEG encoder also takes BGR input
+    directly, so no RGB copy is made.
+    """
+    h, w = frame.shape[:2]
+    if w > width:
+        frame = cv2.resize(frame, (width, int(width * h / w)), interpolation=cv2.INTER_AREA)
+    return cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, PREVIEW_JPEG_QUALITY])[1].tobytes()
 
 
 def process_video_file(uploaded_file, config, progress_bar, status_text):
     """Process uploaded video file."""
-    # Save uploaded file to temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_path = tmp_file.name
+    input_config = config.get('input', {})
+    backend = input_config.get('video_backend', 'opencv')
+    uploaded_file.seek(0)
+    
+    if backend == 'pyav':
+        # PyAV decodes straight from the in-memory upload
+        video_input, tmp_path = uploaded_file, None
+    else:
+        # Stream the upload to a temporary file without an extra in-memory copy
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+            shutil.copyfileobj(uploaded_file, tmp_file, length=1 << 20)
+            tmp_path = tmp_file.name
+        video_input = tmp_path
     
     # Create output path
     output_dir = Path('output')
@@ -68,50 +114,60 @@ def process_video_file(uploaded_file, config, progress_bar, status_text):
     
     # Process video
     try:
-        with VideoFileSource(tmp_path) as source:
+        # Decode ahead on a background thread while frames are processed
+        file_source = VideoFileSource(video_input, backend=backend,
+                                      hwaccel=input_config.get('hwaccel'))
+        with PrefetchingVideoSource(file_source) as source:
             props = source.get_properties()
             total_frames = props['frame_count']
             
             # Setup video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             out = cv2.VideoWriter(
-                output_path, fourcc,
+                output_path, FOURCC_MP4V,
                 props['fps'], (props['width'], props['height'])
             )
             
-            # Process frames
+            # Process frames, detecting batch_size frames per model call
+            batch_size = config['detector'].get('batch_size', 1)
             frame_container = st.empty()
-            tracked_objects = set()
             frame_count = 0
+            last_preview = 0.0
+            end_of_stream = False
             
-            while True:
-                ret, frame = source.read()
-                if not ret:
+            while not end_of_stream:
+                frames = []
+                while len(frames) < batch_size:
+                    ret, frame = source.read()
+                    if not ret:
+                        end_of_stream = True
+                        break
+                    frames.append(frame)
+                if not frames:
                     break
                 
-                # Process frame
-                result = pipeline.process_frame(frame, {
-                    'frame_number': frame_count,
-                    'source_properties': props
-                })
-                
-                vis_frame = result['frame']
-                out.write(vis_frame)
+                # Process the batch; tracking and drawing stay in frame order
+                results = pipeline.process_frames_batch(frames, [
+                    {'frame_number': frame_count + i, 'source_properties': props}
+                    for i in range(len(frames))
+                ], inplace=True)
                 
-                # Update tracked objects
-                for obj in result.get('tracked_objects', []):
-                    tracked_objects.add(obj['id'])
-                
-                # Update progress
-                frame_count += 1
-                progress = frame_count / total_frames if total_frames > 0 else 0
-                progress_bar.progress(progress)
-                status_text.text(f"Processing frame {frame_count}/{total_frames} | Objects tracked: {len(tracked_objects)}")
-                
-                # Show preview every 10th frame
-                if frame_count % 10 == 0:
-                    frame_rgb = cv2.cvtColor(vis_frame, cv2.COLOR_BGR2RGB)
-                    frame_container.image(frame_rgb, channels="RGB", use_container_width=True)
+                for result in results:
+                    vis_frame = result['frame']
+                    out.write(vis_frame)
+                    
+                    # Update progress
+                    frame_count += 1
+                    progress = frame_count / total_frames if total_frames > 0 else 0
+                    progress_bar.progress(progress)
+                    # The tracker keeps one trajectory per track ID it has ever seen
+                    status_text.text(f"Processing frame {frame_count}/{total_frames} | Objects tracked: {len(pipeline.tracker.tracks)}")
+                    
+                    # Show a downscaled preview every 10th frame, at most every PREVIEW_INTERVAL
+                    if frame_count % 10 == 0:
+                        now = time.monotonic()
+                        if now - last_preview >= PREVIEW_INTERVAL:
+                            last_preview = now
+                            frame_container.image(make_preview(vis_frame))
             
             out.release()
             
@@ -121,13 +177,14 @@ def process_video_file(uploaded_file, config, progress_bar, status_text):
             cv2.imwrite(str(heatmap_path), heatmap)
             
             # Clean up temp file
-            Path(tmp_path).unlink()
+            if tmp_path is not None:
+                Path(tmp_path).unlink()
             
             return {
                 'output_path': output_path,
                 'heatmap_path': str(heatmap_path),
                 'frames_processed': frame_count,
-                'objects_tracked': len(tracked_objects),
+                'objects_tracked': len(pipeline.tracker.tracks),
                 'heatmap': heatmap
             }
             
@@ -142,11 +199,11 @@ def process_webcam(config, frame_placeholder, info_placeholder):
     
     cap = cv2.VideoCapture(0)
     frame_count = 0
-    tracked_objects = set()
     
     if 'recording' not in st.session_state:
         st.session_state.recording = False
-        st.session_state.recorded_frames = []
+    if 'recording_writer' not in st.session_state:
+        st.session_state.recording_writer = None
     
     try:
         while st.session_state.webcam_active:
@@ -166,51 +223,46 @@ def process_webcam(config, frame_placeholder, info_placeholder):
             result = pipeline.process_frame(frame, {
                 'frame_number': frame_count,
                 'source_properties': props
-            })
+            }, inplace=True)
             
             vis_frame = result['frame']
             
-            # Update tracked objects
-            for obj in result.get('tracked_objects', []):
-                tracked_objects.add(obj['id'])
-            
-            # Record frame if recording
+            # Record frame if recording, opening the writer on the first frame
             if st.session_state.recording:
-                st.session_state.recorded_frames.append(vis_frame.copy())
+                if st.session_state.recording_writer is None:
+                    output_dir = Path('output')
+                    output_dir.mkdir(exist_ok=True)
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    output_path = str(output_dir / f"webcam_{timestamp}.mp4")
+                    
+                    h, w = vis_frame.shape[:2]
+                    st.session_state.recording_writer = cv2.VideoWriter(output_path, FOURCC_MP4V, 30, (w, h))
+                    st.session_state.recording_path = output_path
+                
+                st.session_state.recording_writer.write(vis_frame)
             
-            # Display frame
-            frame_rgb = cv2.cvtColor(vis_frame, cv2.COLOR_BGR2RGB)
-            frame_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
+            # Display a downscaled JPEG of the frame
+            frame_placeholder.image(make_preview(vis_frame))
             
             # Update info
-            info_placeholder.text(f"Frame: {frame_count} | Objects: {len(result.get('tracked_objects', []))} | Total tracked: {len(tracked_objects)}")
+            info_placeholder.text(f"Frame: {frame_count} | Objects: {len(result.get('tracked_objects', []))} | Total tracked: {len(pipeline.tracker.tracks)}")
             
             frame_count += 1
             
     finally:
+        # The recording writer lives in session state so recording continues
+        # across Streamlit reruns; it is closed by stop_recording()
         cap.release()
-        
-        # Save recording if frames were captured
-        if st.session_state.recording and st.session_state.recorded_frames:
-            output_dir = Path('output')
-            output_dir.mkdir(exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = str(output_dir / f"webcam_{timestamp}.mp4")
-            
-            # Write video
-            if st.session_state.recorded_frames:
-                h, w = st.session_state.recorded_frames[0].shape[:2]
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(output_path, fourcc, 30, (w, h))
-                
-                for frame in st.session_state.recorded_frames:
-                    out.write(frame)
-                
-                out.release()
-                st.success(f"Recording saved to {output_path}")
-            
-            st.session_state.recorded_frames = []
-            st.session_state.recording = False
+
+
+def stop_recording():
+    """Finish the current webcam recording, if any."""
+    writer = st.session_state.get('recording_writer')
+    if writer is not None:
+        writer.release()
+        st.success(f"Recording saved to {st.session_state.recording_path}")
+    st.session_state.recording_writer = None
+    st.session_state.recording = False
 
 
 def main():
@@ -348,15 +400,16 @@ def main():
         with col2:
             if st.button("⏹️ Stop Webcam"):
                 st.session_state.webcam_active = False
+                stop_recording()
         
         with col3:
             if st.button("🔴 Start Recording"):
+                stop_recording()
                 st.session_state.recording = True
-                st.session_state.recorded_frames = []
         
         with col4:
             if st.button("⏸️ Stop Recording"):
-                st.session_state.recording = False
+                stop_recording()
         
         if st.session_state.get('recording', False):
             st.warning("🔴 Recording in progress...")
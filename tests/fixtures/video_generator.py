@@ -22,23 +22,31 @@ def create_test_video(output_path: str, width: int = 640, height: int = 480,
     
     total_frames = int(fps * duration)
     
+    # Precompute every object's position for every frame
+    t = np.arange(total_frames) / total_frames
+    xs = (50 + (width - 100) * t).astype(int)
+    ys = np.empty((num_objects, total_frames), dtype=int)
+    if num_objects > 0:
+        # Horizontal motion
+        ys[0] = height // 3
+    if num_objects > 1:
+        # Sine wave motion
+        ys[1:] = (height // 2 + 100 * np.sin(2 * np.pi * t * 2)).astype(int)
+    
+    # Region touched by one object: the circle plus its label above it
+    (label_width, label_height), baseline = cv2.getTextSize(
+        f"Object {num_objects}", cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+    left, right = 31, max(31, label_width - 29)
+    top, bottom = 36 + label_height, max(31, baseline - 34)
+    
+    # Reuse one white frame, repainting only the regions drawn last frame
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+    
     for frame_num in range(total_frames):
-        # Create white background
-        frame = np.ones((height, width, 3), dtype=np.uint8) * 255
-        
-        # Add moving objects
-        t = frame_num / total_frames
+        x = int(xs[frame_num])
         
         for i in range(num_objects):
-            # Different motion patterns for each object
-            if i == 0:
-                # Horizontal motion
-                x = int(50 + (width - 100) * t)
-                y = height // 3
-            else:
-                # Sine wave motion
-                x = int(50 + (width - 100) * t)
-                y = int(height // 2 + 100 * np.sin(2 * np.pi * t * 2))
+            y = int(ys[i, frame_num])
             
             # Draw circle (simulating person/object)
             color = (0, 0, 255) if i == 0 else (255, 0, 0)
@@ -49,6 +57,11 @@ def create_test_video(output_path: str, width: int = 640, height: int = 480,
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
         
         out.write(frame)
+        
+        for i in range(num_objects):
+            y = int(ys[i, frame_num])
+            frame[max(0, y - top):max(0, y + bottom + 1),
+                  max(0, x - left):max(0, x + right + 1)] = 255
     
     out.release()
     return output_path
@@ -133,13 +133,14 @@ class TestFullPipeline:
         
         # Process video with callback
         with VideoFileSource(test_video) as source:
-            pipeline.process_video(
+            results = pipeline.process_video(
                 source,
                 show_preview=False,
                 progress_callback=progress_callback
             )
         
-        # Verify callbacks were made
+        # Verify callbacks were made; they are throttled, so only the
+        # first and last frames are guaranteed to be reported
         assert len(progress_calls) > 0
         assert progress_calls[0][0] == 0  # First frame
-        assert progress_calls[-1][0] == len(progress_calls) - 1  # Last frame
\ No newline at end of file
+        assert progress_calls[-1][0] == results['frames_processed'] - 1  # Last frame
\ No newline at end of file
@@ -1,8 +1,10 @@
+import contextlib
 import pytest
 import numpy as np
+import cv2
 from unittest.mock import Mock, patch, MagicMock
 
-from src.core import YOLODetector
+from src.core import YOLODetector, Detections
 
 
 class TestYOLODetectorSimple:
@@ -15,6 +17,107 @@ class TestYOLODetectorSimple:
         mock_yolo.assert_called_once_with("test.pt")
         assert detector.device == "cpu"
     
+    @patch('src.core.detector.YOLO')
+    def test_init_exports_reduced_precision(self, mock_yolo, tmp_path):
+        """Test that a quantized export is created once and then reused."""
+        model_path = tmp_path / "test.pt"
+        model_path.touch()
+        
+        def fake_export(**kwargs):
+            exported = tmp_path / "test.onnx"
+            exported.touch()
+            return str(exported)
+        
+        mock_yolo.return_value.export.side_effect = fake_export
+        
+        detector = YOLODetector(model_path=str(model_path), precision="int8",
+                                export_format="onnx", calibration_data="calib.yaml")
+        
+        cached = tmp_path / "test_int8.onnx"
+        assert cached.exists()
+        assert detector.precision == "int8"
+        export_kwargs = mock_yolo.return_value.export.call_args.kwargs
+        assert export_kwargs['format'] == "onnx"
+        assert export_kwargs['int8'] is True
+        assert export_kwargs['data'] == "calib.yaml"
+        mock_yolo.assert_called_with(str(cached), task='detect')
+        
+        # Second construction loads the cached artifact without exporting
+        mock_yolo.reset_mock()
+        YOLODetector(model_path=str(model_path), precision="int8", export_format="onnx")
+        mock_yolo.return_value.export.assert_not_called()
+        mock_yolo.assert_called_once_with(str(cached), task='detect')
+    
+    @patch('src.core.detector.YOLO')
+    def test_export_specialized_on_input_size(self, mock_yolo, tmp_path):
+        """Test that exports are built for imgsz and cached per non-default size."""
+        model_path = tmp_path / "test.pt"
+        model_path.touch()
+        
+        def fake_export(**kwargs):
+            exported = tmp_path / "test.engine"
+            exported.touch()
+            return str(exported)
+        
+        mock_yolo.return_value.export.side_effect = fake_export
+        
+        YOLODetector(model_path=str(model_path), device="cuda", precision="fp16",
+                     export_format="engine", imgsz=1280)
+        
+        assert mock_yolo.return_value.export.call_args.kwargs['imgsz'] == 1280
+        assert (tmp_path / "test_fp16_1280.engine").exists()
+    
+    @patch('src.core.detector.YOLO')
+    def test_compile_model_compiles_predictor_module(self, mock_yolo):
+        """Test that compile_model compiles the module the predictor runs at inference time."""
+        mock_torch = MagicMock()
+        mock_model = mock_yolo.return_value
+        mock_model.names = {0: 'person'}
+        mock_model.predictor = None
+        fused = Mock()
+        used = []
+        
+        # Ultralytics builds its predictor, with a fused copy of the model,
+        # on the first call
+        def predict(*args, **kwargs):
+            if mock_model.predictor is None:
+                mock_model.predictor = Mock()
+                mock_model.predictor.model.model = fused
+            used.append(mock_model.predictor.model.model)
+            result = MagicMock()
+            result.boxes = None
+            return [result]
+        mock_model.side_effect = predict
+        
+        with patch.dict('sys.modules', {'torch': mock_torch}):
+            detector = YOLODetector(compile_model=True)
+            mock_torch.compile.assert_not_called()
+            
+            frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            detector.detect(frame)
+            detector.detect(frame)
+        
+        mock_torch.compile.assert_called_once_with(fused, mode='default', dynamic=False)
+        assert used == [fused, mock_torch.compile.return_value]
+    
+    @patch('src.core.detector.YOLO')
+    def test_init_invalid_precision(self, mock_yolo):
+        """Test that unknown precisions are rejected."""
+        with pytest.raises(ValueError):
+            YOLODetector(precision="fp8")
+    
+    @pytest.mark.parametrize("kwargs", [
+        {'precision': 'fp32', 'export_format': 'onnx'},
+        {'precision': 'fp16', 'export_format': 'engine', 'compile_model': True},
+        {'model_path': 'yolov8n.onnx', 'compile_model': True},
+    ])
+    @patch('src.core.detector.YOLO')
+    def test_init_rejects_ignored_options(self, mock_yolo, kwargs):
+        """Test that options which would have no effect are rejected."""
+        with pytest.raises(ValueError):
+            YOLODetector(**kwargs)
+        mock_yolo.assert_not_called()
+    
     @patch('src.core.detector.YOLO') 
     def test_detect_basic_flow(self, mock_yolo):
         """Test basic detection flow without complex mocking."""
@@ -35,9 +138,170 @@ class TestYOLODetectorSimple:
         
         # Verify model was called
         mock_model.assert_called_once()
-        assert isinstance(detections, list)
+        assert isinstance(detections, Detections)
         assert len(detections) == 0  # No boxes means no detections
     
+    @patch('src.core.detector.YOLO')
+    def test_detect_fp16(self, mock_yolo):
+        """Test that the default FP16 precision runs half-precision inference on GPU but not on CPU."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_result = MagicMock()
+        mock_result.boxes = None
+        mock_model.return_value = [mock_result]
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        
+        detector = YOLODetector(device="cuda:0")
+        with patch.object(detector, '_to_device'):
+            detector.detect(frame)
+        assert mock_model.call_args.kwargs['half'] is True
+        
+        YOLODetector(device="cpu").detect(frame)
+        assert mock_model.call_args.kwargs['half'] is False
+        
+        detector = YOLODetector(device="cuda:0", precision="fp32")
+        with patch.object(detector, '_to_device'):
+            detector.detect(frame)
+        assert mock_model.call_args.kwargs['half'] is False
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_passes_nms_settings(self, mock_yolo):
+        """Test that the NMS IoU threshold and detection cap reach the model call."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_result = MagicMock()
+        mock_result.boxes = None
+        mock_model.return_value = [mock_result]
+        
+        detector = YOLODetector(iou_threshold=0.5, max_det=50)
+        detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+        
+        assert mock_model.call_args.kwargs['iou'] == 0.5
+        assert mock_model.call_args.kwargs['max_det'] == 50
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_batch(self, mock_yolo):
+        """Test batched detection runs a single model call."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_model.names = {0: 'person', 1: 'bicycle'}
+        
+        # First frame has two boxes, second frame has none
+        mock_boxes = MagicMock()
+        mock_boxes.__len__.return_value = 2
+        mock_boxes.xyxy.cpu.return_value.numpy.return_value = np.array(
+            [[10, 10, 50, 50], [60, 60, 90, 90]], dtype=np.float32)
+        mock_boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9, 0.7])
+        mock_boxes.cls.cpu.return_value.numpy.return_value = np.array([0.0, 1.0])
+        result_with_boxes = MagicMock()
+        result_with_boxes.boxes = mock_boxes
+        result_empty = MagicMock()
+        result_empty.boxes = None
+        mock_model.return_value = [result_with_boxes, result_empty]
+        
+        detector = YOLODetector()
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(2)]
+        batch_detections = detector.detect_batch(frames)
+        
+        mock_model.assert_called_once()
+        assert len(batch_detections) == 2
+        assert len(batch_detections[0]) == 2
+        assert batch_detections[0][1]['class_name'] == 'bicycle'
+        assert batch_detections[0][0]['confidence'] == pytest.approx(0.9)
+        assert batch_detections[0].bboxes.shape == (2, 4)
+        assert len(batch_detections[1]) == 0
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_downscales_large_frames(self, mock_yolo):
+        """Test that large frames are shrunk before inference and boxes mapped back."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_model.names = {0: 'person'}
+        
+        mock_boxes = MagicMock()
+        mock_boxes.__len__.return_value = 1
+        mock_boxes.xyxy.cpu.return_value.numpy.return_value = np.array(
+            [[10, 20, 50, 60]], dtype=np.float32)
+        mock_boxes.conf.cpu.return_value.numpy.return_value = np.array([0.9])
+        mock_boxes.cls.cpu.return_value.numpy.return_value = np.array([0.0])
+        mock_result = MagicMock()
+        mock_result.boxes = mock_boxes
+        mock_model.return_value = [mock_result]
+        
+        detector = YOLODetector(imgsz=640)
+        frame = np.zeros((960, 1280, 3), dtype=np.uint8)
+        detections = detector.detect(frame)
+        
+        model_input = mock_model.call_args.args[0]
+        assert model_input.shape == (480, 640, 3)
+        assert mock_model.call_args.kwargs['imgsz'] == 640
+        np.testing.assert_allclose(detections.bboxes, [[20, 40, 100, 120]])
+        
+        # The resize buffer is reused across calls
+        detector.detect(frame)
+        assert mock_model.call_args.args[0] is model_input
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_makes_views_contiguous(self, mock_yolo):
+        """Test that non-contiguous frames are copied into a reused buffer."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_result = MagicMock()
+        mock_result.boxes = None
+        mock_model.return_value = [mock_result]
+        
+        detector = YOLODetector(imgsz=640)
+        frame = np.arange(480 * 1280 * 3, dtype=np.uint8).reshape(480, 1280, 3)[:, ::2]
+        detector.detect(frame)
+        
+        model_input = mock_model.call_args.args[0]
+        assert model_input.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(model_input, frame)
+        
+        detector.detect(frame)
+        assert mock_model.call_args.args[0] is model_input
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_cuda_passes_tensor(self, mock_yolo):
+        """Test that CUDA inference receives an uploaded tensor batch."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_result = MagicMock()
+        mock_result.boxes = None
+        mock_model.return_value = [mock_result, mock_result]
+        
+        detector = YOLODetector(device="cuda")
+        with patch.object(detector, '_to_device') as mock_to_device:
+            detector.detect_batch([np.zeros((480, 640, 3), dtype=np.uint8)] * 2)
+            assert mock_model.call_args.args[0] is mock_to_device.return_value
+            
+            # Mixed frame sizes are padded into the same tensor batch
+            detector.detect_batch([np.zeros((480, 640, 3), dtype=np.uint8),
+                                   np.zeros((240, 320, 3), dtype=np.uint8)])
+            assert mock_to_device.call_count == 2
+            assert mock_model.call_args.args[0] is mock_to_device.return_value
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_gpu_mat_stays_on_device(self, mock_yolo):
+        """Test that GpuMat frames are converted on the GPU rather than downscaled on the host."""
+        mock_model = MagicMock()
+        mock_yolo.return_value = mock_model
+        mock_result = MagicMock()
+        mock_result.boxes = None
+        mock_model.return_value = [mock_result, mock_result]
+        
+        detector = YOLODetector(device="cuda")
+        frames = [cv2.cuda_GpuMat(), cv2.cuda_GpuMat()]
+        with patch.object(detector, '_gpu_mats_to_device', return_value=("batch", 0.5)) as mock_convert, \
+                patch.object(detector, '_downscale') as mock_downscale:
+            assert len(detector.detect_batch(frames)) == 2
+            mock_convert.assert_called_once_with(frames)
+            assert mock_model.call_args.args[0] == "batch"
+            
+            detector.detect(frames[0])
+            assert mock_convert.call_args.args[0] == [frames[0]]
+            mock_downscale.assert_not_called()
+    
     @patch('src.core.detector.YOLO')
     def test_get_class_names(self, mock_yolo):
         """Test getting class names."""
@@ -48,4 +312,118 @@ class TestYOLODetectorSimple:
         detector = YOLODetector()
         names = detector.get_class_names()
         
-        assert names == {0: 'person', 1: 'bicycle', 2: 'car'}
\ No newline at end of file
+        assert names == {0: 'person', 1: 'bicycle', 2: 'car'}
+
+
+@contextlib.contextmanager
+def _cpu_uploads(torch):
+    """Stand in for the CUDA streams and pinned memory, so uploads run on CPU tensors."""
+    with patch.object(torch.cuda, 'Stream'), \
+            patch.object(torch.cuda, 'Event'), \
+            patch.object(torch.cuda, 'current_stream'), \
+            patch.object(torch.cuda, 'stream', lambda stream: contextlib.nullcontext()), \
+            patch.object(torch.Tensor, 'pin_memory', lambda tensor: tensor):
+        yield
+
+
+class _HostMat:
+    """Host array standing in for a cv2.cuda_GpuMat shared through DLPack."""
+    
+    def __init__(self, array):
+        self.array = array
+    
+    def size(self):
+        return self.array.shape[1], self.array.shape[0]
+    
+    def __dlpack__(self, **kwargs):
+        return self.array.__dlpack__(**kwargs)
+    
+    def __dlpack_device__(self):
+        return self.array.__dlpack_device__()
+
+
+def _bgr_to_model(color):
+    """Expected per-channel model input for a BGR color."""
+    return np.array(color[::-1], dtype=np.float32) / 255
+
+
+PAD = np.float32(114) / 255
+
+
+class TestYOLODetectorTensors:
+    """Unit tests for the tensor conversions, run on real CPU tensors."""
+    
+    @patch('src.core.detector.YOLO')
+    def test_to_device_pads_and_normalizes(self, mock_yolo):
+        """Test that frames are padded to the model stride and converted to RGB in [0, 1]."""
+        torch = pytest.importorskip("torch")
+        detector = YOLODetector(device="cpu")
+        small = np.full((40, 50, 3), (10, 20, 30), dtype=np.uint8)
+        tall = np.full((70, 30, 3), (40, 50, 60), dtype=np.uint8)
+        
+        with _cpu_uploads(torch):
+            batch = detector._to_device([small, tall]).numpy()
+        
+        assert batch.shape == (2, 3, 96, 64)
+        assert batch.dtype == np.float32
+        np.testing.assert_allclose(batch[0, :, :40, :50], _bgr_to_model((10, 20, 30))[:, None, None])
+        np.testing.assert_allclose(batch[0, :, 40:], PAD)
+        np.testing.assert_allclose(batch[0, :, :40, 50:], PAD)
+        np.testing.assert_allclose(batch[1, :, :70, 30:], PAD)
+        
+        # Swapping the frames reuses the staging buffer without leaking pixels
+        with _cpu_uploads(torch):
+            batch = detector._to_device([tall, small]).numpy()
+        
+        np.testing.assert_allclose(batch[0, :, :70, :30], _bgr_to_model((40, 50, 60))[:, None, None])
+        np.testing.assert_allclose(batch[0, :, :, 30:], PAD)
+        np.testing.assert_allclose(batch[1, :, 40:], PAD)
+    
+    @patch('src.core.detector.YOLO')
+    def test_gpu_mats_to_device_scales_and_pads(self, mock_yolo):
+        """Test that GpuMat frames are downscaled to imgsz and padded to the model stride."""
+        torch = pytest.importorskip("torch")
+        detector = YOLODetector(device="cpu", imgsz=640)
+        frame = _HostMat(np.full((900, 1280, 3), (10, 20, 30), dtype=np.uint8))
+        
+        def resize(mat, size, interpolation):
+            return _HostMat(cv2.resize(mat.array, size, interpolation=interpolation))
+        
+        with patch('cv2.cuda.resize', side_effect=resize, create=True):
+            batch, scale = detector._gpu_mats_to_device([frame])
+        
+        assert scale == 0.5
+        batch = batch.numpy()
+        assert batch.shape == (1, 3, 480, 640)
+        np.testing.assert_allclose(batch[0, :, :450], _bgr_to_model((10, 20, 30))[:, None, None])
+        np.testing.assert_allclose(batch[0, :, 450:], PAD)
+    
+    @patch('src.core.detector.YOLO')
+    def test_detect_batch_maps_boxes_back_to_frames(self, mock_yolo):
+        """Test that boxes predicted on an uploaded batch are mapped back to each frame's scale."""
+        torch = pytest.importorskip("torch")
+        mock_model = mock_yolo.return_value
+        mock_model.names = {0: 'person'}
+        
+        def result(xyxy):
+            boxes = MagicMock()
+            boxes.__len__.return_value = 1
+            boxes.xyxy = torch.tensor([xyxy])
+            boxes.conf = torch.tensor([0.9])
+            boxes.cls = torch.tensor([0.0])
+            return MagicMock(boxes=boxes)
+        mock_model.return_value = [result([10.0, 20.0, 50.0, 60.0]),
+                                   result([10.0, 20.0, 50.0, 60.0])]
+        
+        detector = YOLODetector(device="cpu", imgsz=640)
+        # Route frames through the tensor upload used on CUDA
+        detector._tensor_input = True
+        frames = [np.zeros((960, 1280, 3), dtype=np.uint8),
+                  np.zeros((480, 640, 3), dtype=np.uint8)]
+        with _cpu_uploads(torch):
+            detections = detector.detect_batch(frames)
+        
+        assert tuple(mock_model.call_args.args[0].shape) == (2, 3, 480, 640)
+        np.testing.assert_allclose(detections[0].bboxes, [[20, 40, 100, 120]])
+        np.testing.assert_allclose(detections[1].bboxes, [[10, 20, 50, 60]])
+        assert detections[0][0]['class_name'] == 'person'
\ No newline at end of file
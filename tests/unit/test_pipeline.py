@@ -1,10 +1,32 @@
+import math
+import threading
+import time
 import pytest
 import numpy as np
 from unittest.mock import Mock, MagicMock, patch
 import cv2
 
+from src.core import Detections, TrackedBatch
 from src.processors import TrackingPipeline
-from src.sources import VideoFileSource
+from src.processors.pipeline import FRAME_RING_SLACK
+from src.sources import VideoFileSource, VideoSource
+
+
+def _mock_source(num_frames=None, frame_count=None, shape=(480, 640, 3)):
+    """Mock video source of black frames, endless when ``num_frames`` is None."""
+    source = Mock()
+    if frame_count is None:
+        frame_count = -1 if num_frames is None else num_frames
+    source.get_properties.return_value = {
+        'width': shape[1], 'height': shape[0], 'fps': 30, 'frame_count': frame_count
+    }
+    if num_frames is None:
+        source.read.side_effect = lambda out=None: (True, np.zeros(shape, dtype=np.uint8))
+    else:
+        source.read.side_effect = [
+            (True, np.zeros(shape, dtype=np.uint8)) for _ in range(num_frames)
+        ] + [(False, None)]
+    return source
 
 
 class TestTrackingPipeline:
@@ -22,6 +44,13 @@ class TestTrackingPipeline:
             visualizer=self.mock_visualizer
         )
     
+    def _pass_frames_through(self):
+        """Stub the components so frames flow through with nothing detected or drawn."""
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.side_effect = lambda frame, *args, **kwargs: frame
+    
     def test_init(self):
         """Test pipeline initialization."""
         assert self.pipeline.detector == self.mock_detector
@@ -38,6 +67,26 @@ class TestTrackingPipeline:
         assert len(self.pipeline.frame_processors) == 1
         assert self.pipeline.frame_processors[0] == custom_processor
     
+    def test_frame_processors_applied_after_add(self):
+        """Test that frames skip processors until one is added."""
+        test_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        processed = np.ones((480, 640, 3), dtype=np.uint8)
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.return_value = test_frame
+        
+        assert self.pipeline.process_frame(test_frame)['frame'] is test_frame
+        
+        processor = Mock(return_value=processed)
+        self.pipeline.add_frame_processor(processor)
+        result = self.pipeline.process_frame(test_frame, {'frame_number': 1})
+        
+        assert result['frame'] is processed
+        metadata = processor.call_args.args[1]
+        assert metadata['metadata'] == {'frame_number': 1}
+        assert metadata['detections'] == []
+    
     def test_process_frame(self):
         """Test processing a single frame."""
         # Setup test data
@@ -61,7 +110,8 @@ class TestTrackingPipeline:
         self.mock_tracker.update.assert_called_once_with(test_detections, (480, 640))
         self.mock_tracker.get_all_trajectories.assert_called_once()
         # Updated to match new draw_frame signature with trajectories
-        self.mock_visualizer.draw_frame.assert_called_once_with(test_frame, test_tracked, test_trajectories)
+        self.mock_visualizer.draw_frame.assert_called_once_with(test_frame, test_tracked, test_trajectories,
+                                                                inplace=False)
         
         # Check result
         assert 'frame' in result
@@ -70,6 +120,130 @@ class TestTrackingPipeline:
         assert result['detections'] == test_detections
         assert result['tracked_objects'] == test_tracked
     
+    def test_process_frame_into_out_buffer(self):
+        """Test that out is passed to the visualizer and cannot be combined with inplace."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        out = np.empty_like(frame)
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        
+        self.pipeline.process_frame(frame, out=out)
+        assert self.mock_visualizer.draw_frame.call_args.kwargs['out'] is out
+        
+        # Drawing in place and into a separate buffer contradict each other
+        with pytest.raises(ValueError):
+            self.pipeline.process_frame(frame, inplace=True, out=out)
+        assert self.mock_detector.detect.call_count == 1
+    
+    def test_process_frames_batch(self):
+        """Test processing several frames with one detector call."""
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(3)]
+        batch_detections = [[{'bbox': np.array([100, 100, 200, 200])}], [], []]
+        
+        self.mock_detector.detect_batch.return_value = batch_detections
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.side_effect = lambda frame, *args, **kwargs: frame
+        
+        results = self.pipeline.process_frames_batch(
+            frames, [{'frame_number': i} for i in range(3)]
+        )
+        
+        self.mock_detector.detect_batch.assert_called_once_with(frames)
+        self.mock_detector.detect.assert_not_called()
+        assert self.mock_tracker.update.call_count == 3
+        assert [r['metadata']['frame_number'] for r in results] == [0, 1, 2]
+        assert results[0]['detections'] == batch_detections[0]
+    
+    def test_motion_gate_skips_static_frames(self):
+        """Test that detection is skipped when consecutive frames match."""
+        pipeline = TrackingPipeline(
+            detector=self.mock_detector,
+            tracker=self.mock_tracker,
+            visualizer=self.mock_visualizer,
+            motion_threshold=2.0
+        )
+        still = np.zeros((480, 640, 3), dtype=np.uint8)
+        moved = np.full((480, 640, 3), 200, dtype=np.uint8)
+        first, second = [{'bbox': np.array([0, 0, 10, 10])}], []
+        
+        self.mock_detector.detect_batch.return_value = [first, second]
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        
+        results = pipeline.process_frames_batch([still, still.copy(), moved])
+        
+        self.mock_detector.detect_batch.assert_called_once()
+        assert len(self.mock_detector.detect_batch.call_args.args[0]) == 2
+        assert [r['detections'] for r in results] == [first, first, second]
+        
+        # A still frame after the batch reuses the last detections
+        pipeline.process_frame(moved.copy())
+        self.mock_detector.detect.assert_not_called()
+    
+    def test_detector_stride_extrapolates_tracks(self):
+        """Test that skipped frames are tracked on extrapolated boxes."""
+        pipeline = TrackingPipeline(
+            detector=self.mock_detector,
+            tracker=self.mock_tracker,
+            visualizer=self.mock_visualizer,
+            detector_stride=3
+        )
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        
+        def tracked_at(x):
+            return TrackedBatch(ids=np.array([1]),
+                                bboxes=np.array([[x, 0, x + 10, 10]], dtype=np.float32),
+                                centers=np.array([[x + 5, 5]]),
+                                class_ids=np.array([0]),
+                                confidences=np.array([0.9], dtype=np.float32),
+                                trajectories=[np.array([[x + 5, 5]])])
+        
+        self.mock_detector.detect.return_value = Detections()
+        self.mock_detector.get_class_names.return_value = {0: 'person'}
+        self.mock_tracker.update.side_effect = [tracked_at(0), tracked_at(4), tracked_at(8)]
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        
+        # Frame 0 is detected, frames 1 and 2 are predicted
+        for _ in range(3):
+            pipeline.process_frame(frame)
+        
+        assert self.mock_detector.detect.call_count == 1
+        predicted = self.mock_tracker.update.call_args_list[2].args[0]
+        assert isinstance(predicted, Detections)
+        np.testing.assert_array_equal(predicted.bboxes, [[8, 0, 18, 10]])
+        assert predicted.class_names == ['person']
+        
+        # Frame 3 is due for detection again
+        self.mock_tracker.update.side_effect = None
+        self.mock_tracker.update.return_value = TrackedBatch()
+        pipeline.process_frame(frame)
+        assert self.mock_detector.detect.call_count == 2
+    
+    def test_scene_change_forces_detection(self):
+        """Test that a cut is detected even when the stride would skip it."""
+        pipeline = TrackingPipeline(
+            detector=self.mock_detector,
+            tracker=self.mock_tracker,
+            visualizer=self.mock_visualizer,
+            detector_stride=10,
+            scene_change_threshold=50.0
+        )
+        dark = np.zeros((480, 640, 3), dtype=np.uint8)
+        bright = np.full((480, 640, 3), 255, dtype=np.uint8)
+        
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        
+        pipeline.process_frame(dark)
+        pipeline.process_frame(dark.copy())
+        assert self.mock_detector.detect.call_count == 1
+        
+        pipeline.process_frame(bright)
+        assert self.mock_detector.detect.call_count == 2
+    
     @patch('cv2.VideoWriter')
     @patch('cv2.imshow')
     @patch('cv2.waitKey')
@@ -108,6 +282,344 @@ class TestTrackingPipeline:
         assert results['total_objects_tracked'] == 0
         assert self.mock_detector.detect.call_count == 3
     
+    @patch('cv2.VideoWriter')
+    def test_process_video_encodes_on_writer_thread(self, mock_writer):
+        """Test that every frame is written in order before the writer is released."""
+        mock_source = Mock()
+        mock_source.get_properties.return_value = {
+            'width': 640, 'height': 480, 'fps': 30, 'frame_count': 5
+        }
+        mock_source.read.side_effect = [
+            (True, np.full((480, 640, 3), i, dtype=np.uint8)) for i in range(5)
+        ] + [(False, None)]
+        
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.side_effect = lambda frame, *args, **kwargs: frame
+        
+        written = []
+        out = mock_writer.return_value
+        out.write.side_effect = lambda frame: written.append(int(frame[0, 0, 0]))
+        
+        self.pipeline.process_video(mock_source, output_path="out.mp4", show_preview=False)
+        
+        assert written == [0, 1, 2, 3, 4]
+        out.release.assert_called_once()
+        
+        # Write errors from the writer thread reach the caller
+        mock_source.read.side_effect = [
+            (True, np.zeros((480, 640, 3), dtype=np.uint8)), (False, None)
+        ]
+        out.write.side_effect = RuntimeError("encode failed")
+        with pytest.raises(RuntimeError, match="encode failed"):
+            self.pipeline.process_video(mock_source, output_path="out.mp4", show_preview=False)
+    
+    @patch('cv2.VideoWriter')
+    def test_process_video_cycles_frame_ring(self, mock_writer):
+        """Test that a file source decodes into a bounded ring of reused frame buffers."""
+        num_frames = 30
+        allocated = []
+        
+        def read(out=None):
+            if read.count == num_frames:
+                return False, None
+            read.count += 1
+            if out is None:
+                out = np.empty((48, 64, 3), dtype=np.uint8)
+                allocated.append(out)
+            out[:] = read.count - 1
+            return True, out
+        read.count = 0
+        
+        mock_source = Mock()
+        mock_source.get_properties.return_value = {
+            'width': 64, 'height': 48, 'fps': 30, 'frame_count': num_frames
+        }
+        mock_source.read.side_effect = read
+        
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.side_effect = lambda frame, *args, **kwargs: frame
+        
+        written = []
+        mock_writer.return_value.write.side_effect = lambda frame: written.append(int(frame[0, 0, 0]))
+        
+        self.pipeline.process_video(mock_source, output_path="out.mp4", show_preview=False)
+        
+        assert written == list(range(num_frames))
+        assert len(allocated) <= 1 + FRAME_RING_SLACK
+    
+    def test_process_video_legacy_source_without_out(self):
+        """Test that sources whose read() predates the out buffer are read without one."""
+        class LegacySource(VideoSource):
+            def __init__(self):
+                self.frames = [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(10)]
+            
+            def read(self):
+                if not self.frames:
+                    return False, None
+                return True, self.frames.pop(0)
+            
+            def release(self):
+                pass
+            
+            def get_properties(self):
+                return {'width': 64, 'height': 48, 'fps': 30, 'frame_count': 10}
+            
+            @property
+            def is_open(self):
+                return bool(self.frames)
+        
+        self._pass_frames_through()
+        frame_numbers = []
+        self.pipeline.add_frame_processor(
+            lambda frame, info: frame_numbers.append(int(frame[0, 0, 0])) or frame)
+        
+        results = self.pipeline.process_video(LegacySource(), show_preview=False)
+        
+        assert results['frames_processed'] == 10
+        assert frame_numbers == list(range(10))
+    
+    def test_process_video_throttles_progress(self):
+        """Test that progress is reported for the first and last frame but not every frame."""
+        num_frames = 10
+        self._pass_frames_through()
+        
+        progress_calls = []
+        self.pipeline.process_video(_mock_source(num_frames), show_preview=False,
+                                    progress_callback=lambda *args: progress_calls.append(args),
+                                    progress_interval=60)
+        
+        assert progress_calls == [(0, num_frames), (num_frames - 1, num_frames)]
+        
+        # A stream that ends early still reports its last processed frame
+        progress_calls.clear()
+        self.pipeline.process_video(_mock_source(3, frame_count=100), show_preview=False,
+                                    progress_callback=lambda *args: progress_calls.append(args),
+                                    progress_interval=60)
+        
+        assert progress_calls == [(0, 100), (2, 100)]
+    
+    @pytest.mark.parametrize("batch_size", [1, 4])
+    def test_process_video_detector_stride(self, batch_size):
+        """Test that only every k-th frame is sent to the detector."""
+        num_frames, detector_stride = 7, 3
+        self.pipeline.detector_stride = detector_stride
+        self._pass_frames_through()
+        
+        last_detections = [{'bbox': np.array([0, 0, 10, 10]), 'confidence': 0.9,
+                            'class_id': 0, 'class_name': 'person'}]
+        self.mock_detector.detect.return_value = last_detections
+        self.mock_detector.detect_batch.side_effect = lambda frames: [last_detections for _ in frames]
+        
+        results = self.pipeline.process_video(_mock_source(num_frames), show_preview=False,
+                                              batch_size=batch_size)
+        
+        detected = (self.mock_detector.detect.call_count
+                    + sum(len(c.args[0]) for c in self.mock_detector.detect_batch.call_args_list))
+        assert detected == math.ceil(num_frames / detector_stride)
+        assert results['frames_processed'] == num_frames
+        # Skipped frames are tracked on the last detections
+        assert all(c.args[0] == last_detections for c in self.mock_tracker.update.call_args_list)
+    
+    def test_process_video_batches_detection(self):
+        """Test that frames are detected in batches, flushing the remainder at EOF."""
+        mock_source = Mock()
+        mock_source.get_properties.return_value = {
+            'width': 640, 'height': 480, 'fps': 30, 'frame_count': 3
+        }
+        mock_source.read.side_effect = [
+            (True, np.full((480, 640, 3), i, dtype=np.uint8)) for i in range(3)
+        ] + [(False, None)]
+        
+        self.mock_detector.detect_batch.side_effect = lambda frames: [[] for _ in frames]
+        self.mock_tracker.update.return_value = []
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        self.mock_visualizer.draw_frame.side_effect = lambda frame, *args, **kwargs: frame
+        
+        results = self.pipeline.process_video(mock_source, show_preview=False, batch_size=2)
+        
+        assert results['frames_processed'] == 3
+        assert [len(c.args[0]) for c in self.mock_detector.detect_batch.call_args_list] == [2, 1]
+        self.mock_detector.detect.assert_not_called()
+        assert self.mock_tracker.update.call_count == 3
+    
+    @patch('cv2.imshow')
+    @patch('cv2.waitKey')
+    @patch('cv2.destroyAllWindows')
+    def test_process_video_stops_on_quit(self, mock_destroy, mock_waitkey, mock_imshow):
+        """Test that quitting the preview stops the worker threads."""
+        self._pass_frames_through()
+        mock_waitkey.side_effect = [-1, ord('q')]
+        
+        results = self.pipeline.process_video(_mock_source(), show_preview=True)
+        
+        assert results['frames_processed'] == 1
+    
+    @patch('cv2.cuda_GpuMat', create=True)
+    @patch('cv2.cuda.getCudaEnabledDeviceCount', create=True, return_value=1)
+    @patch('cv2.namedWindow')
+    @patch('cv2.imshow')
+    @patch('cv2.waitKey', return_value=-1)
+    @patch('cv2.destroyAllWindows')
+    def test_process_video_gpu_preview(self, mock_destroy, mock_waitkey, mock_imshow,
+                                       mock_named_window, mock_device_count, mock_gpu_mat):
+        """Test that the preview is shown from a reused GPU frame when available."""
+        self._pass_frames_through()
+        
+        self.pipeline.process_video(_mock_source(2), show_preview=True)
+        
+        mock_gpu_mat.assert_called_once_with(480, 640, cv2.CV_8UC3)
+        gpu_frame = mock_gpu_mat.return_value
+        assert gpu_frame.upload.call_count == 2
+        mock_imshow.assert_called_with('Tracking', gpu_frame)
+    
+    def test_process_video_live_source_drops_stale_frames(self):
+        """Test that live sources drop the oldest frames when inference falls behind."""
+        self._pass_frames_through()
+        
+        def slow_detect(frame):
+            time.sleep(0.01)
+            return []
+        
+        self.mock_detector.detect.side_effect = slow_detect
+        
+        frame_numbers = []
+        self.pipeline.add_frame_processor(
+            lambda frame, info: frame_numbers.append(info['metadata']['frame_number']) or frame)
+        results = self.pipeline.process_video(_mock_source(40, frame_count=-1, shape=(48, 64, 3)),
+                                              show_preview=False)
+        
+        assert results['frames_processed'] < 40
+        assert frame_numbers == sorted(frame_numbers)
+        assert frame_numbers[-1] == 39
+    
+    def test_process_video_reraises_worker_errors(self):
+        """Test that errors raised on worker threads reach the caller."""
+        self.mock_detector.detect.side_effect = RuntimeError("inference failed")
+        
+        with pytest.raises(RuntimeError, match="inference failed"):
+            self.pipeline.process_video(_mock_source(1), show_preview=False)
+    
+    def test_process_stream_reraises_read_errors(self):
+        """Test that a failing source read is not mistaken for the end of the stream."""
+        mock_source = _mock_source()
+        mock_source.read.side_effect = [
+            (True, np.zeros((480, 640, 3), dtype=np.uint8)),
+            OSError("camera unplugged")
+        ]
+        self._pass_frames_through()
+        
+        with pytest.raises(OSError, match="camera unplugged"):
+            self.pipeline.process_stream(mock_source)
+    
+    def test_call_between_frames_runs_on_tracking_thread(self):
+        """Test that tasks touching the tracker run on the thread that updates it."""
+        self._pass_frames_through()
+        tracking_threads = set()
+        self.mock_tracker.update.side_effect = (
+            lambda *args: tracking_threads.add(threading.current_thread()) or [])
+        task_threads = []
+        task = lambda: task_threads.append(threading.current_thread())
+        
+        def on_result(result):
+            if result['metadata']['frame_number'] == 0:
+                self.pipeline.call_between_frames(task)
+                self.pipeline.call_between_frames(self.pipeline.reset_tracking)
+        
+        self.pipeline.process_stream(_mock_source(10), on_result=on_result)
+        
+        assert len(task_threads) == 1
+        assert task_threads[0] is not threading.current_thread()
+        assert tracking_threads == set(task_threads)
+        self.mock_tracker.reset.assert_called_once()
+        
+        # Without a run in progress, tasks run right away
+        self.pipeline.call_between_frames(task)
+        assert task_threads[-1] is threading.current_thread()
+    
+    def test_process_stream_reraises_writer_errors(self):
+        """Test that a failing writer or callback on a live source raises instead of hanging."""
+        mock_source = _mock_source()
+        self._pass_frames_through()
+        
+        # Stop well after the encoder queue would have filled up
+        def on_result(result):
+            return result['metadata']['frame_number'] < 50
+        
+        writer = Mock()
+        writer.write.side_effect = RuntimeError("disk full")
+        with pytest.raises(RuntimeError, match="disk full"):
+            self.pipeline.process_stream(mock_source, writer=writer, on_result=on_result)
+        
+        writer.write.side_effect = None
+        with pytest.raises(ValueError, match="bad key"):
+            self.pipeline.process_stream(mock_source, writer=writer,
+                                         on_result=Mock(side_effect=ValueError("bad key")))
+    
+    def test_process_video_windowed(self):
+        """Test windowed tracking over detections from the whole video."""
+        from src.core import Detections
+        
+        mock_source = Mock()
+        mock_source.get_properties.return_value = {
+            'width': 640, 'height': 480, 'fps': 30, 'frame_count': 6
+        }
+        mock_source.read.side_effect = [
+            (True, np.zeros((480, 640, 3), dtype=np.uint8)) for _ in range(6)
+        ] + [(False, None)]
+        self.mock_detector.detect.side_effect = [
+            Detections(
+                bboxes=np.array([[10 + 5 * i, 10, 50 + 5 * i, 50]], dtype=np.float32),
+                confidences=np.array([0.9], dtype=np.float32),
+                class_ids=np.array([0]),
+                class_names=['person']
+            ) for i in range(6)
+        ]
+        self.mock_tracker.max_disappeared = 30
+        self.mock_tracker.max_distance = 50
+        
+        results = self.pipeline.process_video_windowed(mock_source, window_size=4, n_jobs=1)
+        
+        assert results['frames_processed'] == 6
+        assert results['total_objects_tracked'] == 1
+        assert len(results['trajectories'][1]) == 6
+        self.mock_tracker.update.assert_not_called()
+    
+    def test_process_video_windowed_detector_stride(self):
+        """Test that windowed mode tracks stride-skipped frames without detections."""
+        pipeline = TrackingPipeline(self.mock_detector, self.mock_tracker, self.mock_visualizer,
+                                    detector_stride=2)
+        # Stride state left over from an earlier run must not carry over
+        pipeline._frames_since_detection = 0
+        
+        mock_source = Mock()
+        mock_source.get_properties.return_value = {
+            'width': 640, 'height': 480, 'fps': 30, 'frame_count': 5
+        }
+        mock_source.read.side_effect = [
+            (True, np.zeros((480, 640, 3), dtype=np.uint8)) for _ in range(5)
+        ] + [(False, None)]
+        self.mock_detector.detect.side_effect = [
+            Detections(
+                bboxes=np.array([[10 + 5 * i, 10, 50 + 5 * i, 50]], dtype=np.float32),
+                confidences=np.array([0.9], dtype=np.float32),
+                class_ids=np.array([0]),
+                class_names=['person']
+            ) for i in range(3)
+        ]
+        self.mock_tracker.max_disappeared = 30
+        self.mock_tracker.max_distance = 50
+        
+        results = pipeline.process_video_windowed(mock_source, window_size=4, n_jobs=1)
+        
+        assert results['frames_processed'] == 5
+        assert self.mock_detector.detect.call_count == 3
+        assert results['total_objects_tracked'] == 1
+        assert len(results['trajectories'][1]) == 3
+    
     def test_generate_heatmap(self):
         """Test heatmap generation."""
         test_trajectories = {1: [(100, 100), (110, 110)]}
@@ -119,4 +631,44 @@ class TestTrackingPipeline:
         heatmap = self.pipeline.generate_heatmap((480, 640))
         
         self.mock_visualizer.create_heatmap.assert_called_once_with((480, 640), test_trajectories)
-        assert heatmap.shape == (480, 640, 3)
\ No newline at end of file
+        assert heatmap.shape == (480, 640, 3)
+    
+    def test_generate_heatmap_uses_accumulated_centers(self):
+        """Test that tracked centers are accumulated as frames are processed."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.mock_detector.detect.return_value = []
+        self.mock_tracker.update.return_value = TrackedBatch(
+            ids=np.array([1, 2]),
+            bboxes=np.zeros((2, 4), dtype=np.float32),
+            centers=np.array([[100, 50], [700, 50]]),
+            trajectories=[np.empty((0, 2)), np.empty((0, 2))]
+        )
+        self.mock_tracker.get_all_trajectories.return_value = {}
+        
+        self.pipeline.process_frame(frame)
+        self.pipeline.process_frame(frame)
+        self.pipeline.generate_heatmap((480, 640))
+        
+        self.mock_visualizer.create_heatmap.assert_not_called()
+        accum = self.mock_visualizer.render_heatmap.call_args.args[0]
+        assert accum[50, 100] == 2
+        assert accum.sum() == 2
+    
+    def test_process_video_starts_with_empty_heatmap(self):
+        """Test that a second video through the same pipeline does not inherit the first's heatmap."""
+        self._pass_frames_through()
+        
+        for center in ([100, 50], [200, 60]):
+            self.mock_tracker.update.return_value = TrackedBatch(
+                ids=np.array([1]),
+                bboxes=np.zeros((1, 4), dtype=np.float32),
+                centers=np.array([center]),
+                trajectories=[np.empty((0, 2))]
+            )
+            self.pipeline.process_video(_mock_source(2), show_preview=False)
+        
+        self.pipeline.generate_heatmap((480, 640))
+        
+        accum = self.mock_visualizer.render_heatmap.call_args.args[0]
+        assert accum[60, 200] == 2
+        assert accum.sum() == 2
\ No newline at end of file
@@ -1,9 +1,12 @@
+import io
+import threading
 import pytest
 import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 import cv2
 
-from src.sources import VideoSource, VideoFileSource, WebcamSource
+from src.sources import (VideoSource, VideoFileSource, WebcamSource, PrefetchingVideoSource,
+                         CudaVideoFileSource)
 
 
 class TestVideoFileSource:
@@ -23,6 +26,25 @@ class TestVideoFileSource:
         assert source.file_path.name == "test.mp4"
         mock_capture.assert_called_once_with("test.mp4")
         
+    @patch('cv2.VideoCapture')
+    @patch('pathlib.Path.exists')
+    def test_init_hwaccel_falls_back(self, mock_exists, mock_capture):
+        """Test that hardware decoding is requested and falls back to the default capture."""
+        mock_exists.return_value = True
+        hw_cap, sw_cap = MagicMock(), MagicMock()
+        hw_cap.isOpened.return_value = False
+        sw_cap.isOpened.return_value = True
+        mock_capture.side_effect = [hw_cap, sw_cap]
+        
+        source = VideoFileSource("test.mp4", hwaccel="vaapi")
+        
+        assert source.cap is sw_cap
+        assert mock_capture.call_args_list[0].args == (
+            "test.mp4", cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_VAAPI])
+        assert mock_capture.call_args_list[1].args == ("test.mp4",)
+        hw_cap.release.assert_called_once()
+    
     @patch('pathlib.Path.exists')
     def test_init_file_not_found(self, mock_exists):
         """Test initialization with non-existent file."""
@@ -75,6 +97,69 @@ class TestVideoFileSource:
         assert props['fps'] == 30
         assert props['frame_count'] == 300
         assert props['source_type'] == 'file'
+        
+        # Only the position is queried again on later calls
+        mock_cap.get.reset_mock()
+        assert source.get_properties() == props
+        mock_cap.get.assert_called_once_with(cv2.CAP_PROP_POS_FRAMES)
+    
+    def test_init_invalid_backend(self):
+        """Test that unknown decoding backends are rejected."""
+        with pytest.raises(ValueError, match="Unsupported video backend"):
+            VideoFileSource("test.mp4", backend="gstreamer")
+    
+    def test_pyav_backend_matches_opencv(self, tmp_path):
+        """Test that the PyAV backend decodes the same BGR frames as OpenCV."""
+        pytest.importorskip("av")
+        video_path = str(tmp_path / "test.mp4")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (64, 48))
+        for i in range(5):
+            writer.write(np.full((48, 64, 3), (i * 40, 0, 255 - i * 40), dtype=np.uint8))
+        writer.release()
+        
+        with VideoFileSource(video_path) as opencv_source, \
+                VideoFileSource(video_path, backend="pyav") as pyav_source:
+            props = pyav_source.get_properties()
+            assert (props['width'], props['height'], props['fps']) == (64, 48, 10)
+            
+            for _ in range(5):
+                _, expected = opencv_source.read()
+                ret, frame = pyav_source.read()
+                assert ret
+                np.testing.assert_allclose(frame, expected, atol=8)
+            
+            assert pyav_source.read() == (False, None)
+            assert pyav_source.seek(2)
+            assert pyav_source.read()[0]
+            assert pyav_source.get_properties()['current_frame'] == 3
+        
+        # PyAV can also decode from an in-memory file object
+        with open(video_path, 'rb') as f:
+            buffer = io.BytesIO(f.read())
+        with VideoFileSource(buffer, backend="pyav") as memory_source:
+            assert sum(memory_source.read()[0] for _ in range(6)) == 5
+    
+    def test_read_into_buffer(self, tmp_path):
+        """Test that frames are decoded into a preallocated buffer."""
+        video_path = str(tmp_path / "test.mp4")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (64, 48))
+        for i in range(2):
+            writer.write(np.full((48, 64, 3), i * 100, dtype=np.uint8))
+        writer.release()
+        
+        buffer = np.empty((48, 64, 3), dtype=np.uint8)
+        with VideoFileSource(video_path) as reference, VideoFileSource(video_path) as source:
+            _, expected = reference.read()
+            ret, frame = source.read(out=buffer)
+        
+        assert ret
+        assert frame is buffer
+        np.testing.assert_array_equal(frame, expected)
+    
+    def test_file_object_requires_pyav(self):
+        """Test that file objects are rejected by the OpenCV backend."""
+        with pytest.raises(ValueError, match="pyav"):
+            VideoFileSource(io.BytesIO(b""))
 
 
 class TestWebcamSource:
@@ -102,6 +187,17 @@ class TestWebcamSource:
         with pytest.raises(RuntimeError):
             WebcamSource(0)
     
+    @patch('cv2.VideoCapture')
+    def test_init_applies_capture_properties(self, mock_capture):
+        """Test that known capture properties are set and unknown ones ignored."""
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_capture.return_value = mock_cap
+        
+        WebcamSource(0, frame_width=1280, not_a_property=1)
+        
+        mock_cap.set.assert_called_once_with(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+    
     @patch('cv2.VideoCapture')
     def test_context_manager(self, mock_capture):
         """Test context manager functionality."""
@@ -114,6 +210,38 @@ class TestWebcamSource:
         
         mock_cap.release.assert_called_once()
 
+    
+    @patch('cv2.VideoCapture')
+    def test_webcam_drops_stale(self, mock_capture):
+        """Test that latest_only returns the newest frame and drops older unread ones."""
+        frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(3)]
+        drained = threading.Event()
+        unplugged = threading.Event()
+        
+        def read(*args):
+            if frames:
+                return True, frames.pop(0)
+            drained.set()
+            unplugged.wait(5)
+            return False, None
+        
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.read.side_effect = read
+        mock_capture.return_value = mock_cap
+        
+        with WebcamSource(0, latest_only=True) as source:
+            assert drained.wait(5)
+            ret, frame = source.read()
+            assert ret
+            assert frame[0, 0, 0] == 2
+            assert source.get_properties()['current_frame'] == 1
+            
+            unplugged.set()
+            assert source.read() == (False, None)
+            assert not source.is_open
+        
+        mock_cap.release.assert_called_once()
 
 class TestVideoSourceAbstract:
     """Test abstract base class behavior."""
@@ -121,4 +249,93 @@ class TestVideoSourceAbstract:
     def test_cannot_instantiate(self):
         """Test that VideoSource cannot be instantiated directly."""
         with pytest.raises(TypeError):
-            VideoSource()
\ No newline at end of file
+            VideoSource()
+
+
+class TestPrefetchingVideoSource:
+    """Unit tests for PrefetchingVideoSource."""
+    
+    def make_source(self, reads):
+        source = Mock()
+        source.get_properties.return_value = {'width': 4, 'height': 2, 'current_frame': 0}
+        source.read.side_effect = reads
+        return source
+    
+    def test_reads_frames_in_order(self):
+        """Test that prefetched frames come back in decode order."""
+        frames = [np.full((2, 4, 3), i, dtype=np.uint8) for i in range(3)]
+        source = self.make_source([(True, f) for f in frames] + [(False, None)])
+        
+        with PrefetchingVideoSource(source) as prefetching:
+            for expected in frames:
+                ret, frame = prefetching.read()
+                assert ret
+                assert frame is expected
+            
+            assert prefetching.read() == (False, None)
+            assert prefetching.read() == (False, None)
+            assert not prefetching.is_open
+            assert prefetching.get_properties()['current_frame'] == 3
+        
+        source.release.assert_called_once()
+    
+    def test_release_stops_blocked_reader(self):
+        """Test that releasing while the buffer is full does not hang."""
+        frame = np.zeros((2, 4, 3), dtype=np.uint8)
+        source = self.make_source(None)
+        source.read.return_value = (True, frame)
+        
+        prefetching = PrefetchingVideoSource(source, prefetch=2)
+        prefetching.read()
+        prefetching.release()
+        
+        assert not prefetching._thread.is_alive()
+    
+    def test_reraises_decode_errors(self):
+        """Test that errors on the decoder thread surface from read()."""
+        source = self.make_source(RuntimeError("decode failed"))
+        
+        with PrefetchingVideoSource(source) as prefetching:
+            with pytest.raises(RuntimeError, match="decode failed"):
+                prefetching.read()
+
+
+class TestCudaVideoFileSource:
+    """Unit tests for CudaVideoFileSource."""
+    
+    @patch('cv2.VideoCapture')
+    @patch('cv2.cudacodec', create=True)
+    @patch('cv2.cuda.getCudaEnabledDeviceCount', create=True, return_value=1)
+    @patch('pathlib.Path.exists', return_value=True)
+    def test_reads_gpu_frames(self, mock_exists, mock_device_count, mock_cudacodec,
+                              mock_capture):
+        """Test that frames are decoded on the GPU and properties come from the container."""
+        mock_capture.return_value.get.side_effect = {
+            cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480,
+            cv2.CAP_PROP_FPS: 30, cv2.CAP_PROP_FRAME_COUNT: 2
+        }.get
+        reader = mock_cudacodec.createVideoReader.return_value
+        gpu_frame = cv2.cuda_GpuMat()
+        reader.nextFrame.side_effect = [(True, gpu_frame), (True, gpu_frame), (False, None)]
+        
+        with CudaVideoFileSource("test.mp4") as source:
+            reader.set.assert_called_once_with(mock_cudacodec.ColorFormat_BGR)
+            assert source.read() == (True, gpu_frame)
+            
+            # A GpuMat passed as out is decoded into
+            assert source.read(out=gpu_frame) == (True, gpu_frame)
+            assert reader.nextFrame.call_args.args == (gpu_frame,)
+            
+            assert source.read() == (False, None)
+            props = source.get_properties()
+            assert (props['width'], props['height'], props['frame_count']) == (640, 480, 2)
+            assert props['current_frame'] == 2
+        
+        assert not source.is_open
+    
+    @patch('cv2.cuda.getCudaEnabledDeviceCount', create=True, return_value=0)
+    @patch('pathlib.Path.exists', return_value=True)
+    def test_requires_cuda(self, mock_exists, mock_device_count):
+        """Test that a missing CUDA device is reported on construction."""
+        with pytest.raises(RuntimeError, match="CUDA"):
+            CudaVideoFileSource("test.mp4")
\ No newline at end of file
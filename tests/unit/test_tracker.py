@@ -2,7 +2,7 @@ import pytest
 import numpy as np
 from unittest.mock import Mock, patch, MagicMock
 
-from src.core import ObjectTracker
+from src.core import ObjectTracker, Detections, TrackedBatch, TrajectoryBuffer
 
 
 class TestObjectTracker:
@@ -49,6 +49,39 @@ class TestObjectTracker:
         assert tracked_objects[1]['id'] == 2
         assert tracked_objects[1]['center'] == (350, 350)
     
+    @patch('supervision.ByteTrack')
+    @patch('supervision.Detections')
+    def test_update_with_soa_detections(self, mock_detections_class, mock_bytetrack):
+        """Test that array-based detections are passed through without conversion."""
+        mock_tracker_instance = MagicMock()
+        mock_bytetrack.return_value = mock_tracker_instance
+        
+        mock_tracks = MagicMock()
+        mock_tracks.tracker_id = np.array([5])
+        mock_tracks.xyxy = np.array([[10.0, 20.0, 30.0, 41.0]])
+        mock_tracks.class_id = np.array([0])
+        mock_tracks.confidence = np.array([0.9])
+        mock_tracker_instance.update_with_detections.return_value = mock_tracks
+        
+        detections = Detections(
+            bboxes=np.array([[10.0, 20.0, 30.0, 41.0]], dtype=np.float32),
+            confidences=np.array([0.9], dtype=np.float32),
+            class_ids=np.array([0]),
+            class_names=['person']
+        )
+        
+        tracker = ObjectTracker()
+        tracked_objects = tracker.update(detections, (480, 640))
+        
+        call_kwargs = mock_detections_class.call_args.kwargs
+        assert call_kwargs['xyxy'] is detections.bboxes
+        assert call_kwargs['confidence'] is detections.confidences
+        assert call_kwargs['class_id'] is detections.class_ids
+        assert isinstance(tracked_objects, TrackedBatch)
+        assert tracked_objects[0]['id'] == 5
+        assert tracked_objects[0]['center'] == (20, 30)
+        assert tracked_objects.as_dicts()[0]['class_id'] == 0
+    
     @patch('supervision.ByteTrack')
     def test_update_no_detections(self, mock_bytetrack):
         """Test updating tracker with no detections."""
@@ -63,12 +96,63 @@ class TestObjectTracker:
         tracker = ObjectTracker()
         
         # Manually add some tracks
-        tracker.tracks[1] = [(100, 100), (110, 110), (120, 120)]
-        tracker.tracks[2] = [(200, 200), (210, 210)]
+        for point in [(100, 100), (110, 110), (120, 120)]:
+            tracker.tracks[1].push(*point)
+        for point in [(200, 200), (210, 210)]:
+            tracker.tracks[2].push(*point)
         
         trajectories = tracker.get_all_trajectories()
         
         assert len(trajectories) == 2
         assert len(trajectories[1]) == 3
         assert len(trajectories[2]) == 2
-        assert trajectories[1][0] == (100, 100)
\ No newline at end of file
+        assert tuple(trajectories[1][0]) == (100, 100)
+    
+    @patch('supervision.ByteTrack')
+    def test_reset(self, mock_bytetrack):
+        """Test that reset clears trajectories and the ByteTrack state in place."""
+        tracker = ObjectTracker()
+        byte_tracker = tracker.byte_tracker
+        tracker.tracks[1].push(100, 100)
+        
+        tracker.reset()
+        
+        assert tracker.get_all_trajectories() == {}
+        assert tracker.byte_tracker is byte_tracker
+        byte_tracker.reset.assert_called_once()
+
+
+class TestTrajectoryBuffer:
+    """Unit tests for TrajectoryBuffer."""
+    
+    def test_unbounded_growth(self):
+        """Test that an unbounded buffer keeps the full history."""
+        buf = TrajectoryBuffer(initial_capacity=2)
+        for i in range(5):
+            buf.push(i, i * 10)
+        
+        assert len(buf) == 5
+        np.testing.assert_array_equal(buf.view(), [[i, i * 10] for i in range(5)])
+    
+    def test_bounded_keeps_latest(self):
+        """Test that a bounded buffer returns the latest points in order."""
+        buf = TrajectoryBuffer(max_len=3)
+        for i in range(7):
+            buf.push(i, -i)
+        
+        view = buf.view()
+        assert len(buf) == 3
+        assert view.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(view, [[4, -4], [5, -5], [6, -6]])
+    
+    def test_view_cached_until_push(self):
+        """Test that view() returns the same array until a new point is pushed."""
+        buf = TrajectoryBuffer(max_len=3)
+        buf.push(1, 1)
+        
+        first = buf.view()
+        assert buf.view() is first
+        
+        buf.push(2, 2)
+        assert buf.view() is not first
+        np.testing.assert_array_equal(buf.view(), [[1, 1], [2, 2]])
\ No newline at end of file
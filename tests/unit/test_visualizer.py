@@ -0,0 +1,176 @@
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import patch
+
+from src.core import TrajectoryVisualizer
+from src.core.visualizer import _dot_radius_runs, _thickness_bands
+
+
+class TestTrajectoryVisualizer:
+    """Unit tests for TrajectoryVisualizer."""
+    
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.visualizer = TrajectoryVisualizer()
+    
+    def test_accumulate_points(self):
+        """Test that points are counted per pixel and out-of-frame points dropped."""
+        trajectories = {
+            1: np.array([[10, 20], [10, 20], [30, 40]], dtype=np.int32),
+            2: [(30, 40), (700, 40), (-1, 5)],
+        }
+        
+        accum = self.visualizer._accumulate_points((480, 640), trajectories)
+        
+        assert accum.shape == (480, 640)
+        assert accum[20, 10] == 2.0
+        assert accum[40, 30] == 2.0
+        assert accum.sum() == 4.0
+    
+    def test_accumulate_points_ignores_points_outside_frame(self):
+        """Test that points off the frame are not counted or wrapped onto other pixels."""
+        trajectories = {1: np.array([[-1, 0], [10, 0], [0, 10], [9, 9]], dtype=np.int32)}
+        
+        accum = self.visualizer._accumulate_points((10, 10), trajectories)
+        
+        assert accum.sum() == 1.0
+        assert accum[9, 9] == 1.0
+    
+    def test_accumulate_points_recency_weighted(self):
+        """Test that later points in a trajectory get larger weights."""
+        trajectories = {1: np.array([[0, 0], [1, 0], [2, 0], [3, 0]], dtype=np.int32)}
+        
+        accum = self.visualizer._accumulate_points((10, 10), trajectories, recency_weighted=True)
+        
+        np.testing.assert_allclose(accum[0, :4], [0.25, 0.5, 0.75, 1.0])
+    
+    def test_create_heatmap_peaks_at_points(self):
+        """Test that the heatmap is hottest where trajectories pass."""
+        trajectories = {1: np.array([[100, 100]] * 5, dtype=np.int32)}
+        
+        heatmap = self.visualizer.create_heatmap((240, 320), trajectories)
+        
+        assert heatmap.shape == (240, 320, 3)
+        assert heatmap.dtype == np.uint8
+        # COLORMAP_JET maps the maximum to red (high R, low B)
+        assert heatmap[100, 100, 2] > heatmap[100, 100, 0]
+        assert heatmap[0, 0, 0] > heatmap[0, 0, 2]
+
+    
+    def test_create_heatmap_incremental_matches_full(self):
+        """Test that adding points incrementally gives the same heatmap as a fresh build."""
+        first = {1: np.array([[50, 60], [55, 65]], dtype=np.int32)}
+        grown = {1: np.array([[50, 60], [55, 65], [70, 80]], dtype=np.int32),
+                 2: np.array([[200, 100]], dtype=np.int32)}
+        
+        self.visualizer.create_heatmap((240, 320), first)
+        incremental = self.visualizer.create_heatmap((240, 320), grown)
+        
+        fresh = TrajectoryVisualizer().create_heatmap((240, 320), grown)
+        np.testing.assert_array_equal(incremental, fresh)
+    
+    def test_create_heatmap_reuses_render_when_unchanged(self):
+        """Test that an unchanged set of trajectories is not re-rendered."""
+        trajectories = {1: np.array([[50, 60], [55, 65]], dtype=np.int32)}
+        
+        first = self.visualizer.create_heatmap((240, 320), trajectories)
+        second = self.visualizer.create_heatmap((240, 320), trajectories)
+        
+        assert second is first
+    
+    def test_create_heatmap_rebuilds_after_reset(self):
+        """Test that vanished tracks trigger a rebuild rather than stale counts."""
+        self.visualizer.create_heatmap((240, 320), {1: np.array([[50, 60]] * 3, dtype=np.int32)})
+        after_reset = self.visualizer.create_heatmap((240, 320), {1: np.array([[200, 100]], dtype=np.int32)})
+        
+        fresh = TrajectoryVisualizer().create_heatmap((240, 320), {1: np.array([[200, 100]], dtype=np.int32)})
+        np.testing.assert_array_equal(after_reset, fresh)
+    
+    def test_render_heatmap_opencl_matches_cpu(self):
+        """Test that rendering through UMat returns the same host image as the CPU path."""
+        accum = np.zeros((120, 160), dtype=np.float32)
+        accum[60, 80] = 3.0
+        accum[20, 30] = 1.0
+        
+        with patch('cv2.ocl.haveOpenCL', return_value=True):
+            opencl = TrajectoryVisualizer(use_opencl=True)
+        rendered = opencl.render_heatmap(accum)
+        
+        assert opencl.use_opencl
+        assert isinstance(rendered, np.ndarray)
+        np.testing.assert_allclose(rendered, self.visualizer.render_heatmap(accum), atol=1)
+    
+    def test_create_heatmap_follows_bounded_trajectories(self):
+        """Test that trajectories trimmed from the front are recounted, not frozen."""
+        from src.core import TrajectoryBuffer
+        
+        buf = TrajectoryBuffer(max_len=3)
+        for x in range(3):
+            buf.push(10 * x + 50, 60)
+        self.visualizer.create_heatmap((240, 320), {1: buf.view()})
+        buf.push(200, 100)
+        updated = self.visualizer.create_heatmap((240, 320), {1: buf.view()})
+        
+        fresh = TrajectoryVisualizer().create_heatmap((240, 320), {1: buf.view().copy()})
+        np.testing.assert_array_equal(updated, fresh)
+    
+    @pytest.mark.parametrize("num_points,base", [(2, 2), (50, 2), (50, 5), (7, 3)])
+    def test_thickness_bands_match_per_segment_taper(self, num_points, base):
+        """Test that thickness runs reproduce the per-segment taper."""
+        expected = [max(1, int(base * (i / num_points))) for i in range(1, num_points)]
+        
+        actual = [None] * (num_points - 1)
+        for first, last, thickness in _thickness_bands(num_points, base):
+            actual[first:last] = [thickness] * (last - first)
+        
+        assert actual == expected    
+    @pytest.mark.parametrize("num_points", [2, 5, 6, 50, 100])
+    def test_dot_radius_runs_match_per_dot_radius(self, num_points):
+        """Test that radius runs reproduce the per-dot radius."""
+        expected = [max(1, int(3 * (i / num_points)))
+                    for i in range(len(range(0, num_points, 5)))]
+        
+        actual = []
+        for first, stop, radius in _dot_radius_runs(num_points):
+            assert first == len(actual)
+            actual.extend([radius] * (stop - first))
+        
+        assert actual == expected
+    
+    def test_draw_frame_into_out_buffer(self):
+        """Test that drawing into an out buffer leaves the input frame untouched."""
+        frame = np.zeros((100, 100, 3), dtype=np.uint8)
+        out = np.empty_like(frame)
+        tracked = [{'id': 1, 'bbox': np.array([10, 10, 50, 50]), 'center': (30, 30),
+                    'trajectory': np.array([[20, 20], [30, 30]])}]
+        
+        vis_frame = self.visualizer.draw_frame(frame, tracked, out=out)
+        
+        assert vis_frame is out
+        assert out.any()
+        assert not frame.any()
+        
+        # inplace only agrees with an out buffer that is the frame itself
+        with pytest.raises(ValueError):
+            self.visualizer.draw_frame(frame, tracked, inplace=True, out=out)
+        assert self.visualizer.draw_frame(frame, tracked, inplace=True, out=frame) is frame
+        assert frame.any()
+    
+    def test_draw_frame_trajectory_dots_match_circles(self):
+        """Test that the batched trajectory dots rasterize like per-point filled circles."""
+        visualizer = TrajectoryVisualizer(show_bbox=False, show_id=False)
+        trajectory = np.array([[10 + 7 * i, 20 + 3 * i] for i in range(30)], dtype=np.int32)
+        tracked = [{'id': 3, 'bbox': np.array([0, 0, 1, 1]), 'center': (0, 0),
+                    'trajectory': trajectory}]
+        frame = np.zeros((120, 240, 3), dtype=np.uint8)
+        
+        vis_frame = visualizer.draw_frame(frame, tracked)
+        
+        expected = frame.copy()
+        color = visualizer.colors[3]
+        for first, last, thickness in _thickness_bands(len(trajectory), visualizer.trajectory_thickness):
+            cv2.polylines(expected, [trajectory[first:last + 1]], False, color, thickness)
+        for i, point in enumerate(trajectory[::5].tolist()):
+            cv2.circle(expected, point, max(1, int(3 * (i / len(trajectory)))), color, -1)
+        np.testing.assert_array_equal(vis_frame, expected)
@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+
+from src.core import Detections
+from src.processors.windowed import track_window, link_tracklets
+
+
+def make_detections(x):
+    """Single-box detections centered at (x + 20, 30)."""
+    return Detections(
+        bboxes=np.array([[x, 10, x + 40, 50]], dtype=np.float32),
+        confidences=np.array([0.9], dtype=np.float32),
+        class_ids=np.array([0]),
+        class_names=['person']
+    )
+
+
+class TestLinkTracklets:
+    """Unit tests for link_tracklets."""
+    
+    def test_links_across_boundary(self):
+        """Test that a track continuing across a boundary keeps one ID."""
+        windows = [
+            {1: (0, 4, np.array([[10, 10], [20, 10]])),
+             2: (0, 1, np.array([[300, 300]]))},
+            {7: (5, 9, np.array([[25, 10], [30, 10]]))},
+        ]
+        
+        trajectories = link_tracklets(windows, [0, 5], max_gap=2, max_distance=50)
+        
+        assert len(trajectories) == 2
+        np.testing.assert_array_equal(trajectories[1], [[10, 10], [20, 10], [25, 10], [30, 10]])
+        np.testing.assert_array_equal(trajectories[2], [[300, 300]])
+    
+    def test_distant_tracklets_stay_separate(self):
+        """Test that tracklets further apart than max_distance are not linked."""
+        windows = [
+            {1: (0, 4, np.array([[10, 10]]))},
+            {1: (5, 9, np.array([[400, 10]]))},
+        ]
+        
+        trajectories = link_tracklets(windows, [0, 5], max_gap=2, max_distance=50)
+        
+        assert sorted(trajectories) == [1, 2]
+
+
+class TestTrackWindow:
+    """Unit tests for track_window."""
+    
+    def test_matches_single_window(self):
+        """Test that stitched windows reproduce tracking the whole sequence."""
+        detections = [make_detections(10 + 5 * i) for i in range(10)]
+        kwargs = {'max_disappeared': 30, 'max_distance': 50}
+        
+        whole = track_window(0, detections, (480, 640), kwargs)
+        windows = [track_window(0, detections[:5], (480, 640), kwargs),
+                   track_window(5, detections[5:], (480, 640), kwargs)]
+        stitched = link_tracklets(windows, [0, 5], max_gap=30, max_distance=50)
+        
+        assert len(whole) == 1 and len(stitched) == 1
+        first, last, points = next(iter(whole.values()))
+        assert (first, last) == (0, 9)
+        np.testing.assert_array_equal(next(iter(stitched.values())), points)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import cv2
+
+from src.processors import create_video_writer
+
+
+class TestCreateVideoWriter:
+    """Unit tests for create_video_writer."""
+    
+    @patch('cv2.VideoWriter')
+    def test_mp4v_skips_gstreamer(self, mock_writer):
+        """Test that the software encoder opens a plain file writer."""
+        create_video_writer('out.mp4', 30, (640, 480), encoder='mp4v')
+        
+        mock_writer.assert_called_once_with(
+            'out.mp4', cv2.VideoWriter_fourcc(*'mp4v'), 30, (640, 480)
+        )
+    
+    @patch('cv2.VideoWriter')
+    def test_hardware_encoder(self, mock_writer):
+        """Test that an opened GStreamer writer is returned directly."""
+        mock_writer.return_value.isOpened.return_value = True
+        
+        writer = create_video_writer('out.mp4', 30, (640, 480), encoder='nvenc')
+        
+        assert writer is mock_writer.return_value
+        args = mock_writer.call_args.args
+        assert 'nvh264enc' in args[0]
+        assert 'location="out.mp4"' in args[0]
+        assert args[1] == cv2.CAP_GSTREAMER
+    
+    @patch('cv2.VideoWriter')
+    def test_falls_back_to_codec(self, mock_writer):
+        """Test fallback to the software codec when GStreamer fails."""
+        gst_writer = MagicMock()
+        gst_writer.isOpened.return_value = False
+        fallback_writer = MagicMock()
+        mock_writer.side_effect = [gst_writer, fallback_writer]
+        
+        writer = create_video_writer('out.mp4', 30, (640, 480), encoder='x264')
+        
+        assert writer is fallback_writer
+        gst_writer.release.assert_called_once()
+    
+    @patch('cv2.VideoWriter')
+    def test_ffmpeg_hardware_encoder(self, mock_writer):
+        """Test that the FFmpeg encoder requests hardware-accelerated H.264."""
+        mock_writer.return_value.isOpened.return_value = True
+        
+        writer = create_video_writer('out.mp4', 30, (640, 480), encoder='ffmpeg')
+        
+        assert writer is mock_writer.return_value
+        mock_writer.assert_called_once_with(
+            'out.mp4', cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*'avc1'), 30, (640, 480),
+            [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        )
+    
+    @patch('cv2.VideoWriter')
+    def test_hardware_encoder_quotes_location(self, mock_writer):
+        """Test that paths with spaces reach filesink as one quoted location."""
+        mock_writer.return_value.isOpened.return_value = True
+        
+        create_video_writer('my videos/out "1".mp4', 30, (640, 480), encoder='x264')
+        
+        assert mock_writer.call_args.args[0].endswith(
+            'filesink location="my videos/out \\"1\\".mp4"')
+    
+    @patch('cv2.VideoWriter')
+    def test_non_mp4_output_keeps_codec(self, mock_writer):
+        """Test that H.264 encoders are skipped for containers they cannot write."""
+        create_video_writer('out.avi', 30, (640, 480), encoder='auto')
+        
+        mock_writer.assert_called_once_with(
+            'out.avi', cv2.VideoWriter_fourcc(*'mp4v'), 30, (640, 480)
+        )
+    
+    def test_unknown_encoder(self):
+        """Test that an unknown encoder name is rejected."""
+        with pytest.raises(ValueError, match="Unknown encoder"):
+            create_video_writer('out.mp4', 30, (640, 480), encoder='divx')